@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co Benchmark History
+Keeps every validation, benchmark and smoke-test run and flags regressions
+against a chosen baseline
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+HISTORY_DIR = ".bench-history"
+
+# Regression gates: relative growth in median latency / size, and absolute error-rate growth
+LATENCY_THRESHOLD = 0.10
+SIZE_THRESHOLD = 0.05
+ERROR_RATE_THRESHOLD = 0.01
+
+# One-sided significance level for latency changes, and the samples each side needs
+ALPHA = 0.05
+MIN_SAMPLES = 5
+
+# Latency metrics with fewer samples than MIN_SAMPLES (one fetch per URL in a
+# validation run) are also compared together under this name, pooled over
+# the URLs both runs fetched
+POOLED_LATENCY = "latency:*"
+
+def package_fingerprint(package_dir="deployment-package/public_html"):
+    """One SHA-256 over the package manifest, identifying the content that was tested"""
+    from package_builder import build_manifest
+    if not os.path.isdir(package_dir):
+        return None
+    manifest = build_manifest(package_dir)
+    digest = hashlib.sha256()
+    for path, file_digest in sorted(manifest.items()):
+        digest.update(f"{file_digest}  {path}\n".encode())
+    return digest.hexdigest()
+
+class History:
+    """Runs appended to history.jsonl, named baselines kept in tags.json"""
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = Path(root)
+        self.runs_path = self.root / "history.jsonl"
+        self.tags_path = self.root / "tags.json"
+
+    def record(self, tool, metrics, target=None, details=None, package_dir="deployment-package/public_html"):
+        """Append a run and return it
+
+        metrics maps a name such as "latency:/editor.php" to a list of samples
+        (seconds) or, for size:/error_rate: metrics, a single number.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        run = {
+            # Microseconds and a random suffix keep runs started in the same second apart
+            "id": f"{stamp}.{int(now % 1 * 1e6):06d}-{os.urandom(2).hex()}-{tool}",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)),
+            "tool": tool,
+            "target": target,
+            "package": package_fingerprint(package_dir),
+            "metrics": metrics,
+            "details": details or {},
+        }
+        with open(self.runs_path, "a") as f:
+            f.write(json.dumps(run, sort_keys=True) + "\n")
+        return run
+
+    def runs(self, tool=None):
+        if not self.runs_path.exists():
+            return []
+        runs = []
+        with open(self.runs_path) as f:
+            for line in f:
+                if line.strip():
+                    run = json.loads(line)
+                    if tool is None or run["tool"] == tool:
+                        runs.append(run)
+        return runs
+
+    def tags(self):
+        try:
+            with open(self.tags_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def tag(self, run_id, name):
+        tags = self.tags()
+        tags[name] = run_id
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.tags_path, "w") as f:
+            json.dump(tags, f, indent=2, sort_keys=True)
+
+    def resolve(self, ref, tool=None, before=None):
+        """Find a run by id, tag, "latest" or "previous" (the run before `before`)"""
+        runs = self.runs(tool)
+        ref = self.tags().get(ref, ref)
+        if ref == "latest":
+            return runs[-1] if runs else None
+        if ref == "previous":
+            # By position, so the run recorded just before `before` is found
+            # even if an id were ever repeated
+            index = len(runs)
+            if before is not None:
+                index = next((i for i in range(len(runs) - 1, -1, -1) if runs[i] == before), index)
+            return runs[index - 1] if index > 0 else None
+        for run in reversed(self.runs()):
+            if run["id"] == ref:
+                return run
+        return None
+
+def _samples(value):
+    return value if isinstance(value, list) else [value]
+
+def _median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+def mann_whitney_greater(baseline, candidate):
+    """One-sided p-value that candidate values tend to be larger than baseline
+
+    Mann-Whitney U with tie correction and the normal approximation; good
+    enough from about five samples a side, which is what MIN_SAMPLES enforces.
+    """
+    n1, n2 = len(baseline), len(candidate)
+    combined = sorted([(v, 0) for v in baseline] + [(v, 1) for v in candidate])
+    ranks = [0.0] * len(combined)
+    ties = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 1)
+    u = rank_sum - n2 * (n2 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def _pooled_latency(baseline, candidate):
+    """Samples of the shared latency metrics too small to test alone, pooled per run"""
+    before, after = [], []
+    for name in sorted(set(baseline["metrics"]) & set(candidate["metrics"])):
+        if not name.startswith("latency:") or name == POOLED_LATENCY:
+            continue
+        old = _samples(baseline["metrics"][name])
+        new = _samples(candidate["metrics"][name])
+        if old and new and (len(old) < MIN_SAMPLES or len(new) < MIN_SAMPLES):
+            before.extend(old)
+            after.extend(new)
+    return before, after
+
+def compare_runs(baseline, candidate, latency_threshold=LATENCY_THRESHOLD,
+                 size_threshold=SIZE_THRESHOLD, error_threshold=ERROR_RATE_THRESHOLD, alpha=ALPHA):
+    """Compare the metrics two runs share; returns one row per metric
+
+    Latency metrics with too few samples of their own are also compared
+    pooled, as POOLED_LATENCY, so a run that fetched each page once can
+    still flag a slowdown across its pages.
+    """
+    rows = []
+    pooled = _pooled_latency(baseline, candidate)
+    metrics = [(name, _samples(baseline["metrics"][name]), _samples(candidate["metrics"][name]))
+               for name in sorted(set(baseline["metrics"]) & set(candidate["metrics"]))]
+    if len(pooled[0]) >= MIN_SAMPLES and len(pooled[1]) >= MIN_SAMPLES:
+        metrics.append((POOLED_LATENCY, *pooled))
+    for name, before, after in metrics:
+        kind = name.split(":", 1)[0]
+        if not before or not after:
+            continue
+        old, new = _median(before), _median(after)
+        change = (new - old) / old if old else (0.0 if new == old else math.inf)
+        row = {"metric": name, "baseline": old, "candidate": new, "change": change,
+               "p_value": None, "regression": False}
+        if kind == "latency":
+            if len(before) >= MIN_SAMPLES and len(after) >= MIN_SAMPLES:
+                row["p_value"] = mann_whitney_greater(before, after)
+                row["regression"] = change > latency_threshold and row["p_value"] < alpha
+        elif kind == "error_rate":
+            row["regression"] = new - old > error_threshold
+        else:
+            row["regression"] = change > size_threshold
+        rows.append(row)
+    return rows
+
+def gate_run(history, run, gate):
+    """Compare a just-recorded run with a baseline run or tag; False only on a regression"""
+    baseline = history.resolve(gate, run["tool"], before=run)
+    if not baseline:
+        print(f"⚠️ No baseline '{gate}' to compare against yet")
+        return True
+    print("")
+    return print_comparison(baseline, run, compare_runs(baseline, run))
+
+def _format_value(name, value):
+    kind = name.split(":", 1)[0]
+    if kind == "latency":
+        return f"{value * 1000:.1f}ms"
+    if kind == "error_rate":
+        return f"{value * 100:.1f}%"
+    return f"{value / 1024:.1f}KB" if value >= 1024 else f"{value:g}B"
+
+def print_comparison(baseline, candidate, rows):
+    print(f"📋 Baseline:  {baseline['id']} (package {str(baseline.get('package'))[:12]})")
+    print(f"📋 Candidate: {candidate['id']} (package {str(candidate.get('package'))[:12]})")
+    print("")
+    for row in rows:
+        name = row["metric"]
+        status = "❌" if row["regression"] else ("⚠️" if row["change"] > 0 and row["p_value"] is None
+                                                 and name.startswith("latency") else "✅")
+        p_value = f" p={row['p_value']:.3f}" if row["p_value"] is not None else ""
+        print(f"{status} {name}: {_format_value(name, row['baseline'])} -> "
+              f"{_format_value(name, row['candidate'])} ({row['change'] * 100:+.1f}%{p_value})")
+    regressions = [r for r in rows if r["regression"]]
+    print("")
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over the configured thresholds")
+    else:
+        print("✅ No significant regressions")
+    return not regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history and regression gating for EzEdit.co")
+    parser.add_argument("--history", default=HISTORY_DIR, help="history directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    show = sub.add_parser("list", help="list recorded runs")
+    show.add_argument("--tool", help="only runs of this tool (validate, benchmark, smoke)")
+
+    tag = sub.add_parser("tag", help="name a run, e.g. as the baseline")
+    tag.add_argument("run")
+    tag.add_argument("name")
+
+    compare = sub.add_parser("compare", help="compare a run against a baseline")
+    compare.add_argument("--tool", default="benchmark", help="which tool's runs to compare")
+    compare.add_argument("--baseline", default="previous", help="run id, tag or 'previous'")
+    compare.add_argument("--candidate", default="latest", help="run id, tag or 'latest'")
+    compare.add_argument("--latency-threshold", type=float, default=LATENCY_THRESHOLD)
+    compare.add_argument("--size-threshold", type=float, default=SIZE_THRESHOLD)
+    compare.add_argument("--error-threshold", type=float, default=ERROR_RATE_THRESHOLD)
+    compare.add_argument("--alpha", type=float, default=ALPHA)
+
+    args = parser.parse_args()
+    history = History(args.history)
+
+    if args.command == "list":
+        tags = {}
+        for name, run_id in history.tags().items():
+            tags.setdefault(run_id, []).append(name)
+        for run in history.runs(args.tool):
+            label = f" [{', '.join(tags[run['id']])}]" if run["id"] in tags else ""
+            print(f"{run['id']}  {run['tool']:<9} package {str(run.get('package'))[:12]}  "
+                  f"{len(run['metrics'])} metrics{label}")
+        return True
+
+    if args.command == "tag":
+        run = history.resolve(args.run)
+        if not run:
+            print(f"❌ No run '{args.run}'")
+            return False
+        history.tag(run["id"], args.name)
+        print(f"🏷️ {args.name} -> {run['id']}")
+        return True
+
+    candidate = history.resolve(args.candidate, args.tool)
+    baseline = history.resolve(args.baseline, args.tool, before=candidate)
+    if not candidate or not baseline:
+        print("❌ Need both a baseline and a candidate run to compare")
+        return False
+    rows = compare_runs(baseline, candidate, args.latency_threshold, args.size_threshold,
+                        args.error_threshold, args.alpha)
+    return print_comparison(baseline, candidate, rows)
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -4,19 +4,100 @@ EzEdit.co DigitalOcean Deployment Script
 Deploys the complete application to the DigitalOcean server
 """
 
-import paramiko
+import argparse
+import gzip
+import json
 import os
+import shlex
 import sys
+import tarfile
+import threading
+import time
 from pathlib import Path
 
-def deploy_to_server():
-    """Deploy EzEdit.co to DigitalOcean server"""
+from deploy_timing import DeployTimer, step
+from ezedit_config import DROPLET_IP, HTTP_PORT, REMOTE_BASE, REMOTE_TMP, SSH_PASSWORD, SSH_PORT
+from package_builder import OUTPUT_FILE, PACKAGE_DIR, build_manifest, build_package
+from package_builder import STAGING_DIR, stage_package, write_package_tar
+from package_store import PackageStore
+from sftp_transfer import SFTPPool, TransferStats, upload_files, upload_resumable
+from ssh_pool import get_pool, open_client
+
+# Server details (host, ports and REMOTE_BASE come from ezedit_config)
+HOSTNAME = DROPLET_IP
+USERNAME = "root"
+PASSWORD = SSH_PASSWORD
+DEPLOYMENT_FILE = OUTPUT_FILE
+
+# Upload concurrency: SFTP channels per SSH connection, and SSH connections
+SFTP_CHANNELS = 4
+SFTP_CONNECTIONS = 1
+
+# Delta deploys compare the staged package (STAGING_DIR) against the live docroot
+REMOTE_ROOT = f"{REMOTE_BASE}/html"
+REMOTE_MANIFEST = f"{REMOTE_BASE}/.ezedit-manifest.json"
+MANIFEST_MARKER = "--- ezedit-manifest ---"
+
+# Release layout: each deploy goes into its own directory under RELEASES_DIR
+# and CURRENT_LINK is switched to it atomically. REMOTE_ROOT is a symlink to
+# CURRENT_LINK once the first release has been activated.
+RELEASE_BASE = f"{REMOTE_BASE}/ezedit"
+RELEASES_DIR = f"{RELEASE_BASE}/releases"
+CURRENT_LINK = f"{RELEASE_BASE}/current"
+RELEASE_ID_PATTERN = "^[0-9]{8}_[0-9]{6}$"
+
+# Files that live only on the server (never in the package) and are copied
+# from the live release into every new full or streamed release
+RELEASE_SHARED_PATHS = ["public/.env"]
+
+# Retention: after each switch the oldest releases are pruned until at most
+# RELEASES_KEEP remain and together they fit in RELEASES_BUDGET_MB (files
+# hard-linked between releases count once). The live release is never
+# pruned, and neither are the newest RELEASES_MIN, so a rollback target
+# always exists.
+RELEASES_KEEP = 5
+RELEASES_BUDGET_MB = 1024
+RELEASES_MIN = 2
+
+# Prefix of the lines run_remote_script() uses to delimit steps in the output
+STEP_MARKER = "@@ezedit-step"
+
+# Fleet deploys: hosts deployed at once, and pages that must answer 200 before
+# the next rolling batch starts
+FLEET_PARALLEL = 4
+HEALTH_ENDPOINT = "/public/health.php"
+HEALTH_CHECK_PATHS = [HEALTH_ENDPOINT, "/", "/auth/login.php", "/editor.php"]
+
+# Post-deploy health gate, timed like app-spec.yaml's health_check: probes
+# time out after HEALTH_TIMEOUT, polls start HEALTH_MIN_INTERVAL apart and
+# back off to HEALTH_MAX_INTERVAL, and a release that is not healthy within
+# HEALTH_DEADLINE seconds is rolled back
+HEALTH_TIMEOUT = 5
+HEALTH_MIN_INTERVAL = 0.25
+HEALTH_MAX_INTERVAL = 10
+HEALTH_DEADLINE = 60
+
+def connect(hostname=HOSTNAME, username=USERNAME, password=PASSWORD, port=SSH_PORT, shared=True):
+    """Open an SSH connection to the server
+    
+    By default this is the run's shared, keepalive-enabled connection to the
+    host (closing it is a no-op); shared=False opens a separate one, which is
+    what extra upload connections want.
+    """
+    if shared:
+        return get_pool().get(hostname, port, username, password)
+    return open_client(hostname, port, username, password)
+
+def deploy_to_server(channels=SFTP_CHANNELS, connections=SFTP_CONNECTIONS,
+                     hostname=HOSTNAME, package=None):
+    """Deploy EzEdit.co to DigitalOcean server
+    
+    `package` is the manifest of an already built DEPLOYMENT_FILE; without
+    it the package is built first.
+    """
     
-    # Server details
-    hostname = "159.65.224.175"
-    username = "root"
-    password = "MattKaylaS2two"
-    deployment_file = "ezedit-complete-deployment.tar.gz"
+    deployment_file = DEPLOYMENT_FILE
+    remote_file = f"{REMOTE_TMP}/{os.path.basename(deployment_file)}"
     
     print("🚀 EzEdit.co DigitalOcean Deployment")
     print("====================================")
@@ -24,10 +105,16 @@ def deploy_to_server():
     print(f"Package: {deployment_file}")
     print("")
     
-    # Check if deployment file exists
-    if not os.path.exists(deployment_file):
-        print(f"❌ Deployment file '{deployment_file}' not found!")
-        return False
+    timer = DeployTimer("full", hostname)
+    
+    # Build the package with modes and ownership already set
+    if package is None:
+        if not os.path.isdir(PACKAGE_DIR):
+            print(f"❌ Package directory '{PACKAGE_DIR}' not found!")
+            return False
+        with timer.phase("build") as span:
+            package = build_package(PACKAGE_DIR, deployment_file)
+            span["bytes"] = package["size"]
     
     # Get file size
     file_size = os.path.getsize(deployment_file)
@@ -35,78 +122,1032 @@ def deploy_to_server():
     print("")
     
     try:
-        # Create SSH client
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
         print("🔐 Connecting to server...")
-        ssh.connect(hostname, username=username, password=password, timeout=30)
+        with timer.phase("connect"):
+            ssh = connect(hostname)
         print("✅ Connected successfully!")
         
-        # Create SFTP client for file upload
-        sftp = ssh.open_sftp()
-        
         print("📤 Uploading deployment package...")
-        sftp.put(deployment_file, f"/tmp/{deployment_file}")
-        print("✅ Upload completed!")
+        with timer.phase("upload") as span:
+            # Chunked and hash-checked; an interrupted upload resumes on the next attempt
+            stats = upload_resumable(lambda: connect(hostname, shared=False), deployment_file, remote_file,
+                                     connections, channels, ssh=ssh)
+            span["bytes"] = stats.done_bytes
+        print("✅ Upload completed and verified!")
         
-        # Close SFTP
-        sftp.close()
+        # A dropped connection during the upload leaves `ssh` unusable
+        transport = ssh.get_transport()
+        if transport is None or not transport.is_active():
+            ssh = connect(hostname)
         
         # Execute deployment commands
         print("🔧 Deploying application...")
         
+        release_id = new_release_id()
+        release_dir = f"{RELEASES_DIR}/{release_id}"
+        timer.release = release_id
+        staged_manifest = f"{REMOTE_TMP}/ezedit-{release_id}.manifest.json"
+        write_remote_manifest(ssh, package["files"], staged_manifest)
         commands = [
-            "cd /var/www/html",
-            "echo 'Creating backup...'",
-            "mkdir -p /backup/$(date +%Y%m%d_%H%M%S)",
-            "cp -r * /backup/$(date +%Y%m%d_%H%M%S)/ 2>/dev/null || true",
+            f"echo 'Preparing release {release_id}...'",
+            # Never extract an archive that is not byte-for-byte the one built
+            package_verify_step(package["sha256"], remote_file),
+            *release_empty_steps(release_dir),
             "echo 'Extracting deployment package...'",
-            f"tar -xzf /tmp/{deployment_file} --strip-components=1",
-            "echo 'Setting permissions...'",
-            "chown -R www-data:www-data /var/www/html",
-            "chmod -R 755 /var/www/html",
-            "find /var/www/html -name '*.php' -exec chmod 644 {} \\;",
-            "find /var/www/html -name '*.css' -exec chmod 644 {} \\;",
-            "find /var/www/html -name '*.js' -exec chmod 644 {} \\;",
+            # Modes and www-data ownership come from the archive; --touch gives
+            # files the deploy time so nginx validators change with content
+            step("extract", f"tar -xzf {remote_file} --strip-components=1 --same-owner "
+                            f"--same-permissions --touch -C {release_dir}"),
+            step("manifest", f"mv -f {staged_manifest} {release_dir}.manifest.json"),
+            *release_shared_steps(release_dir),
+            *release_dedupe_steps(release_dir),
             "echo 'Cleaning up...'",
-            f"rm -f /tmp/{deployment_file}",
+            step("cleanup", f"rm -f {remote_file}"),
+            "echo 'Switching to new release...'",
+            *release_switch_steps(release_dir),
             "echo 'Restarting web server...'",
-            "systemctl reload nginx 2>/dev/null || true",
+            step("reload", "systemctl reload nginx 2>/dev/null || true"),
             "echo '✅ Deployment completed successfully!'"
         ]
         
-        for cmd in commands:
-            stdin, stdout, stderr = ssh.exec_command(cmd)
-            stdout.channel.recv_exit_status()  # Wait for command to complete
-            
-            # Print any output
-            output = stdout.read().decode().strip()
-            if output:
-                print(f"   {output}")
+        with timer.phase("remote"):
+            results = run_remote_script(ssh, commands)
+        timer.add_remote_steps("remote", results)
+        if not steps_succeeded(results):
+            ssh.close()
+            print(f"❌ Step failed: {results[-1]['step'] if results else 'remote shell'}")
+            return timer.finish(False)
         
         # Close SSH connection
         ssh.close()
         
-        print("")
-        print("🎉 EzEdit.co deployment completed successfully!")
-        print(f"🌐 Your site is now live at: http://{hostname}/")
-        print("")
-        print("Test these URLs:")
-        print(f"  Homepage:     http://{hostname}/index.php")
-        print(f"  Dashboard:    http://{hostname}/dashboard.php")
-        print(f"  Editor:       http://{hostname}/editor.php")
-        print(f"  Login:        http://{hostname}/auth/login.php")
-        print(f"  Register:     http://{hostname}/auth/register.php")
-        print(f"  Documentation: http://{hostname}/docs.php")
-        print("")
-        
-        return True
+        with timer.phase("record"):
+            record_deploy(PackageStore(), hostname, STAGING_DIR, release_dir, package["files"],
+                          pruned_releases(results))
+        print_live_urls(hostname)
+        
+        return timer.finish(True)
         
     except Exception as e:
         print(f"❌ Deployment failed: {str(e)}")
+        return timer.finish(False)
+
+def new_release_id():
+    """Name a release after the local time, evaluated once per deploy"""
+    return time.strftime("%Y%m%d_%H%M%S")
+
+def package_verify_step(digest, remote_file):
+    """Step that fails unless the uploaded package has the given SHA-256
+    
+    The checksum line goes in as a here-string, so no echo is needed.
+    """
+    return step("verify", f"sha256sum -c --quiet <<< '{digest}  {remote_file}'")
+
+def release_base_steps(release_dir, remote_root=REMOTE_ROOT):
+    """Steps that create a release directory hard-linked to the live tree
+    
+    Delta deploys start from this copy and only write what changed.
+    Unchanged files share inodes with the previous release, so this costs
+    directory entries rather than bytes. Anything written into the release
+    afterwards must first unlink its target (tar and rm do; an in-place
+    write would also change the previous release).
+    """
+    return [
+        step("prepare", f"test ! -e {release_dir}"),
+        step("prepare", f"mkdir -p {RELEASES_DIR}"),
+        step("prepare", f"if [ -d {remote_root} ]; then cp -al {remote_root}/. {release_dir}; "
+                        f"else mkdir -p {release_dir}; fi"),
+    ]
+
+def release_empty_steps(release_dir):
+    """Steps that create an empty release directory for a whole package
+    
+    Full and streamed deploys extract into it, so a file dropped from the
+    package is not in the new release; release_dedupe_steps then links the
+    unchanged files to the live release.
+    """
+    return [
+        step("prepare", f"test ! -e {release_dir}"),
+        step("prepare", f"mkdir -p {release_dir}"),
+    ]
+
+def release_shared_steps(release_dir, remote_root=REMOTE_ROOT):
+    """Steps that copy RELEASE_SHARED_PATHS from the live tree into a release"""
+    steps = []
+    for path in RELEASE_SHARED_PATHS:
+        source = shlex.quote(f"{remote_root}/{path}")
+        target = shlex.quote(f"{release_dir}/{path}")
+        parent = shlex.quote(os.path.dirname(f"{release_dir}/{path}"))
+        steps.append(step("shared", f"if [ -e {source} ]; then mkdir -p {parent} && cp -a {source} {target}; fi"))
+    return steps
+
+def release_dedupe_steps(release_dir):
+    """Steps that hard-link a freshly extracted release to the live one
+    
+    Every file that is byte-identical to the same path in the live release
+    is replaced by a link to it, so a full deploy only adds the bytes that
+    changed. Unchanged files also keep their mtime, and with it their HTTP
+    validators.
+    """
+    return [
+        step("dedupe", f"live=$(readlink -f {CURRENT_LINK}) && [ -d \"$live\" ] && (cd {release_dir} && "
+                       f"find . -type f -links 1 -print0 | while IFS= read -r -d '' f; do "
+                       f"[ -f \"$live/$f\" ] && cmp -s \"$f\" \"$live/$f\" && ln -f \"$live/$f\" \"$f\"; "
+                       f"done; true) || true"),
+    ]
+
+def release_prune_steps():
+    """Steps that prune the oldest releases beyond RELEASES_KEEP or RELEASES_BUDGET_MB"""
+    budget_kb = RELEASES_BUDGET_MB * 1024
+    return [
+        step("prune", f"(cd {RELEASES_DIR} && current=$(basename \"$(readlink -f {CURRENT_LINK})\") && "
+                      f"for r in $(ls -1 | grep -E '{RELEASE_ID_PATTERN}' | sort); do "
+                      f"n=$(ls -1 | grep -cE '{RELEASE_ID_PATTERN}'); used=$(du -sk . | cut -f1); "
+                      f"if [ $n -le {RELEASES_MIN} ] || "
+                      f"{{ [ $n -le {RELEASES_KEEP} ] && [ $used -le {budget_kb} ]; }}; then break; fi; "
+                      f"[ \"$r\" = \"$current\" ] && continue; "
+                      f"rm -rf \"$r\" \"$r.manifest.json\" && echo \"Pruned release $r\"; done)"),
+    ]
+
+def pruned_releases(results):
+    """Release ids that release_prune_steps reported removing in a script's results"""
+    return [line.split()[-1] for result in results for line in result.get("output", [])
+            if line.startswith("Pruned release ")]
+
+def release_switch_steps(release_dir, prune=True):
+    """Steps that atomically point the live docroot at a release directory
+    
+    The new symlink is created beside CURRENT_LINK and renamed over it, so a
+    request sees either the old release or the new one, never a mix. The
+    first run also moves a plain REMOTE_ROOT directory aside and replaces
+    it with a symlink to CURRENT_LINK. With prune, old releases are then
+    pruned (see release_prune_steps).
+    """
+    release_id = os.path.basename(release_dir)
+    return [
+        step("switch", f"ln -sfn {release_dir} {CURRENT_LINK}.next"),
+        step("switch", f"mv -T {CURRENT_LINK}.next {CURRENT_LINK}"),
+        step("switch", f"if [ ! -L {REMOTE_ROOT} ]; then "
+                       f"{{ [ ! -e {REMOTE_ROOT} ] || mv {REMOTE_ROOT} {REMOTE_ROOT}.pre-release-{release_id}; }} "
+                       f"&& ln -s {CURRENT_LINK} {REMOTE_ROOT}; fi"),
+        step("manifest", f"if [ -f {release_dir}.manifest.json ]; then "
+                         f"cp -f {release_dir}.manifest.json {REMOTE_MANIFEST}; else rm -f {REMOTE_MANIFEST}; fi"),
+        step("reload", "systemctl reload 'php*-fpm' 2>/dev/null || true"),
+        *(release_prune_steps() if prune else []),
+    ]
+
+def build_remote_script(steps, stop_on_error=True):
+    """Wrap each step with markers carrying its exit status and remote timestamps
+    
+    Each marker starts on a line of its own even when the step's output
+    did not end with a newline (the blank lines this leaves are ignored).
+    """
+    clock = '"${EPOCHREALTIME:-$(date +%s.%N)}"'
+    lines = ["exec 2>&1"]
+    for index, step in enumerate(steps):
+        lines.append(f"printf '\\n%s\\n' \"{STEP_MARKER} start {index} \"{clock}")
+        lines.append(step)
+        lines.append("__rc=$?")
+        lines.append(f"printf '\\n%s\\n' \"{STEP_MARKER} end {index} $__rc \"{clock}")
+        if stop_on_error:
+            lines.append("[ $__rc -eq 0 ] || exit $__rc")
+    return "\n".join(lines) + "\n"
+
+def run_remote_script(ssh, steps, stop_on_error=True, echo=True, feed=None):
+    """Run a sequence of shell steps in one remote shell over a single channel
+    
+    The steps share one shell, so a leading `cd` applies to everything after
+    it. Output is streamed as it arrives. Returns one dict per step that ran,
+    with its exit status and remote wall-clock seconds.
+    
+    Each result also carries the lines the step printed, as "output".
+    
+    Normally the script itself travels over stdin. With `feed`, the script is
+    passed as the command instead and feed(stdin) is called on a separate
+    thread to stream data to whichever step reads stdin.
+    """
+    script = build_remote_script(steps, stop_on_error)
+    sent_at = time.monotonic()
+    feed_errors = []
+    if feed is None:
+        stdin, stdout, stderr = ssh.exec_command("bash -s")
+        stdin.write(script)
+        stdin.channel.shutdown_write()
+    else:
+        stdin, stdout, stderr = ssh.exec_command(f"bash -c {shlex.quote(script)}")
+        
+        def pump():
+            try:
+                feed(stdin)
+            except Exception as e:
+                feed_errors.append(e)
+            finally:
+                stdin.channel.shutdown_write()
+        
+        feeder = threading.Thread(target=pump, daemon=True)
+        feeder.start()
+    
+    results = []
+    started = {}
+    output = []
+    for raw in stdout:
+        line = raw.rstrip("\n")
+        if line.startswith(STEP_MARKER):
+            fields = line.split()
+            index = int(fields[2])
+            if fields[1] == "start":
+                started[index] = float(fields[3])
+                output = []
+            else:
+                results.append({
+                    "step": steps[index],
+                    "status": int(fields[3]),
+                    "seconds": float(fields[4]) - started.get(index, float(fields[4])),
+                    "output": output,
+                })
+        elif line.strip():
+            output.append(line)
+            if echo:
+                print(f"   {line}")
+    exit_status = stdout.channel.recv_exit_status()
+    total = time.monotonic() - sent_at
+    if feed is not None:
+        feeder.join()
+        if feed_errors:
+            print(f"⚠️ Streaming input stopped early: {feed_errors[0]}")
+    
+    # A step that killed the shell outright never printed its end marker
+    finished = len(results)
+    if started and max(started) >= finished:
+        results.append({"step": steps[max(started)], "status": exit_status or 1,
+                        "seconds": 0.0, "output": output})
+    
+    if echo:
+        print_step_timings(results, total)
+    return results
+
+def steps_succeeded(results):
+    """True when a run_remote_script() run completed without a failing step"""
+    return bool(results) and results[-1]["status"] == 0
+
+def print_step_timings(results, total):
+    """Print exit status and duration of each remote step"""
+    print("")
+    print("⏱️ Remote steps:")
+    for result in results:
+        status = "✅" if result["status"] == 0 else f"❌ ({result['status']})"
+        step = result["step"] if len(result["step"]) <= 72 else result["step"][:69] + "..."
+        print(f"   {result['seconds']:7.3f}s {status} {step}")
+    print(f"   {total:7.3f}s total (one round trip)")
+    print("")
+
+def site_url(hostname, path="/"):
+    """URL of a page on a host, on the configured HTTP port"""
+    port = "" if HTTP_PORT == 80 else f":{HTTP_PORT}"
+    return f"http://{hostname}{port}{path}"
+
+def print_live_urls(hostname):
+    """Print the URLs to check after a deployment"""
+    print("")
+    print("🎉 EzEdit.co deployment completed successfully!")
+    print(f"🌐 Your site is now live at: {site_url(hostname)}")
+    print("")
+    print("Test these URLs:")
+    print(f"  Homepage:     {site_url(hostname, '/index.php')}")
+    print(f"  Dashboard:    {site_url(hostname, '/dashboard.php')}")
+    print(f"  Editor:       {site_url(hostname, '/editor.php')}")
+    print(f"  Login:        {site_url(hostname, '/auth/login.php')}")
+    print(f"  Register:     {site_url(hostname, '/auth/register.php')}")
+    print(f"  Documentation: {site_url(hostname, '/docs.php')}")
+    print("")
+
+def fetch_remote_manifest(ssh, remote_root=REMOTE_ROOT, manifest_path=REMOTE_MANIFEST):
+    """Hash the live docroot and read back the manifest of the last delta deploy
+    
+    Both come back from a single remote command. Returns (current, owned):
+    current maps every file on the server to its hash, owned is the set of
+    paths the previous delta deploy shipped (only these are ever deleted).
+    """
+    root = shlex.quote(remote_root)
+    cmd = (
+        f"cd {root} 2>/dev/null || exit 0; "
+        f"find . -type f -print0 | xargs -0 -r sha256sum; "
+        f"echo '{MANIFEST_MARKER}'; "
+        f"cat {shlex.quote(manifest_path)} 2>/dev/null || true"
+    )
+    stdin, stdout, stderr = ssh.exec_command(cmd)
+    output = stdout.read().decode()
+    stdout.channel.recv_exit_status()
+    
+    hashes, _, stored = output.partition(MANIFEST_MARKER)
+    current = {}
+    for line in hashes.splitlines():
+        digest, sep, path = line.partition("  ")
+        if sep:
+            current[path[2:] if path.startswith("./") else path] = digest
+    
+    owned = set()
+    if stored.strip():
+        try:
+            owned = set(json.loads(stored)["files"])
+        except (ValueError, KeyError):
+            print("⚠️ Ignoring unreadable remote manifest")
+    return current, owned
+
+def diff_manifests(local, current, owned):
+    """Work out which files to upload and which to delete"""
+    upload = sorted(path for path, digest in local.items() if current.get(path) != digest)
+    delete = sorted(path for path in owned if path not in local and path in current)
+    return upload, delete
+
+def write_remote_manifest(ssh, files, remote_path):
+    """Write the manifest of a deploy's files to the server over SFTP"""
+    sftp = ssh.open_sftp()
+    with sftp.open(remote_path, "w") as f:
+        f.write(json.dumps({"files": files}, indent=2, sort_keys=True))
+    sftp.close()
+
+def deploy_delta(package_dir=PACKAGE_DIR, remote_root=REMOTE_ROOT,
+                 manifest_path=REMOTE_MANIFEST, dry_run=False, release=True,
+                 channels=SFTP_CHANNELS, connections=SFTP_CONNECTIONS, hostname=HOSTNAME,
+                 stage=True):
+    """Deploy only the files that differ between the package and the server
+    
+    With release=True the changes go into a new release directory that
+    hard-links everything else from the live tree, and the docroot is
+    switched to it once the upload is complete. Otherwise the live tree
+    is patched in place. With stage=False package_dir is deployed as it
+    is instead of being staged first.
+    """
+    
+    print("🚀 EzEdit.co Delta Deployment")
+    print("=============================")
+    print(f"Server: {hostname}")
+    print(f"Package: {package_dir}")
+    print("")
+    
+    if not os.path.isdir(package_dir):
+        print(f"❌ Package directory '{package_dir}' not found!")
         return False
+    
+    timer = DeployTimer("delta" if release else "in-place", hostname)
+    if stage:
+        with timer.phase("stage"):
+            stage_package(package_dir)
+        package_dir = STAGING_DIR
+    with timer.phase("manifest"):
+        local = build_manifest(package_dir)
+    print(f"📦 Local manifest: {len(local)} files")
+    
+    try:
+        print("🔐 Connecting to server...")
+        with timer.phase("connect"):
+            ssh = connect(hostname)
+        print("✅ Connected successfully!")
+        
+        print("🔍 Fetching remote manifest...")
+        with timer.phase("diff"):
+            current, owned = fetch_remote_manifest(ssh, remote_root, manifest_path)
+            upload, delete = diff_manifests(local, current, owned)
+        upload_bytes = sum(os.path.getsize(os.path.join(package_dir, p)) for p in upload)
+        print(f"📊 {len(upload)} to upload ({upload_bytes / 1024:.1f} KB), "
+              f"{len(delete)} to delete, {len(local) - len(upload)} unchanged")
+        
+        for path in upload:
+            print(f"   + {path}")
+        for path in delete:
+            print(f"   - {path}")
+        
+        if dry_run:
+            ssh.close()
+            print("🧪 Dry run, nothing changed")
+            return True
+        
+        if not upload and not delete:
+            ssh.close()
+            print("✅ Server already matches the package")
+            return timer.finish(True)
+        
+        if release:
+            release_dir = f"{RELEASES_DIR}/{new_release_id()}"
+            target_root = release_dir
+            timer.release = os.path.basename(release_dir)
+            print(f"📁 Preparing release {release_dir}...")
+        else:
+            release_dir = None
+            target_root = remote_root
+        
+        root = shlex.quote(target_root)
+        prepare = release_base_steps(release_dir, remote_root) if release else []
+        # Break hard links shared with other releases before anything is written
+        unlink = upload + delete if release else upload
+        if unlink:
+            quoted = " ".join(shlex.quote(p) for p in unlink)
+            prepare.append(step("cleanup", f"cd {root} && rm -f {quoted}"))
+        dirs = sorted({os.path.dirname(p) for p in upload} - {""})
+        if dirs:
+            prepare.append(step("prepare", "mkdir -p " + " ".join(shlex.quote(f"{target_root}/{d}") for d in dirs)))
+        if prepare:
+            with timer.phase("prepare"):
+                results = run_remote_script(ssh, prepare, echo=False)
+            timer.add_remote_steps("prepare", results)
+            if not steps_succeeded(results):
+                ssh.close()
+                print("❌ Could not prepare the target directory")
+                return timer.finish(False)
+        
+        # Files whose content the server already holds are copied there, not uploaded
+        store = PackageStore()
+        reuse = plan_reuse(upload, local, current, store.target_blobs(hostname), remote_root,
+                           unavailable=set() if release else set(upload))
+        missed = []
+        if reuse:
+            with timer.phase("reuse") as span:
+                missed = reuse_remote_blobs(ssh, reuse, local, target_root, link=release)
+                span["files"] = len(reuse) - len(missed)
+        transfer = [p for p in upload if p not in reuse or p in missed]
+        if reuse:
+            print(f"♻️ Reused {len(reuse) - len(missed)} files already on the server")
+        
+        if transfer:
+            print("📤 Uploading changed files...")
+            pairs = [(os.path.join(package_dir, p), f"{target_root}/{p}") for p in transfer]
+            with timer.phase("upload", files=len(pairs)) as span:
+                with SFTPPool(lambda: connect(hostname, shared=False), connections, channels, ssh=ssh) as pool:
+                    span["bytes"] = upload_files(pool, pairs).done_bytes
+        
+        # Record what this deploy owns so the next delta knows what it may delete.
+        # It lives outside the docroot so the file list is never served.
+        write_remote_manifest(ssh, local, f"{release_dir}.manifest.json" if release else manifest_path)
+        
+        finish = []
+        if upload:
+            quoted = " ".join(shlex.quote(p) for p in upload)
+            finish.append(step("permissions", f"cd {root} && {{ chown www-data:www-data {quoted} && "
+                                              f"chmod 644 {quoted} "
+                                              f"|| echo '⚠️ Could not set ownership/permissions on uploaded files'; }}"))
+        if delete and not release:
+            finish.append(step("cleanup", f"cd {root} && rm -f " + " ".join(shlex.quote(p) for p in delete)))
+        if release:
+            finish.extend(release_switch_steps(release_dir))
+        with timer.phase("activate"):
+            results = run_remote_script(ssh, finish)
+        timer.add_remote_steps("activate", results)
+        if not steps_succeeded(results):
+            ssh.close()
+            print("❌ Could not activate the deployed files")
+            return timer.finish(False)
+        
+        ssh.close()
+        with timer.phase("record"):
+            record_deploy(store, hostname, package_dir, target_root, local, pruned_releases(results))
+        print_live_urls(hostname)
+        return timer.finish(True)
+        
+    except Exception as e:
+        print(f"❌ Delta deployment failed: {str(e)}")
+        return timer.finish(False)
+
+class _CountingWriter:
+    """Write-through wrapper that feeds byte counts to a TransferStats"""
+    
+    def __init__(self, f, stats):
+        self.f = f
+        self.stats = stats
+    
+    def write(self, data):
+        self.f.write(data)
+        self.stats.add(len(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+
+def deploy_stream(package_dir=PACKAGE_DIR, compresslevel=6, hostname=HOSTNAME, stage=True):
+    """Deploy by streaming the package straight into a remote tar
+    
+    The archive is built and gzipped on the fly and written into the stdin
+    of `tar -x` in the new release directory, all over one SSH channel.
+    Neither side writes an intermediate archive, and local reads, remote
+    extraction and the network transfer overlap.
+    """
+    
+    print("🚀 EzEdit.co Streaming Deployment")
+    print("=================================")
+    print(f"Server: {hostname}")
+    print(f"Package: {package_dir}")
+    print("")
+    
+    if not os.path.isdir(package_dir):
+        print(f"❌ Package directory '{package_dir}' not found!")
+        return False
+    
+    timer = DeployTimer("stream", hostname)
+    if stage:
+        with timer.phase("stage"):
+            stage_package(package_dir)
+        package_dir = STAGING_DIR
+    
+    try:
+        print("🔐 Connecting to server...")
+        with timer.phase("connect"):
+            ssh = connect(hostname)
+        print("✅ Connected successfully!")
+        
+        # The manifest has to be on the server before the switch, which runs
+        # in the same script as the stream
+        with timer.phase("manifest"):
+            local = build_manifest(package_dir)
+        release_id = new_release_id()
+        release_dir = f"{RELEASES_DIR}/{release_id}"
+        timer.release = release_id
+        staged_manifest = f"{REMOTE_TMP}/ezedit-{release_id}.manifest.json"
+        write_remote_manifest(ssh, local, staged_manifest)
+        commands = [
+            f"echo 'Preparing release {release_id}...'",
+            *release_empty_steps(release_dir),
+            "echo 'Streaming and extracting deployment package...'",
+            step("extract", f"tar -xzf - --strip-components=1 --same-owner --same-permissions "
+                            f"--touch -C {release_dir}"),
+            step("manifest", f"mv -f {staged_manifest} {release_dir}.manifest.json"),
+            *release_shared_steps(release_dir),
+            *release_dedupe_steps(release_dir),
+            "echo 'Switching to new release...'",
+            *release_switch_steps(release_dir),
+            "echo 'Restarting web server...'",
+            step("reload", "systemctl reload nginx 2>/dev/null || true"),
+            "echo '✅ Deployment completed successfully!'"
+        ]
+        
+        stats = TransferStats(0)
+        files = {}
+        
+        def feed(stdin):
+            sink = _CountingWriter(stdin, stats)
+            with gzip.GzipFile(filename="", mode="wb", fileobj=sink,
+                               compresslevel=compresslevel, mtime=0) as gz:
+                with tarfile.open(fileobj=gz, mode="w|", format=tarfile.GNU_FORMAT) as tar:
+                    files.update(write_package_tar(tar, package_dir))
+        
+        print("🔧 Deploying application...")
+        with timer.phase("stream") as span:
+            stats.start()
+            results = run_remote_script(ssh, commands, feed=feed)
+            stats.stop()
+            span["bytes"] = stats.done_bytes
+        timer.add_remote_steps("stream", results)
+        ssh.close()
+        
+        if not steps_succeeded(results):
+            print(f"❌ Step failed: {results[-1]['step'] if results else 'remote shell'}")
+            return timer.finish(False)
+        
+        with timer.phase("record"):
+            record_deploy(PackageStore(), hostname, package_dir, release_dir, files,
+                          pruned_releases(results))
+        print_live_urls(hostname)
+        return timer.finish(True)
+        
+    except Exception as e:
+        print(f"❌ Streaming deployment failed: {str(e)}")
+        return timer.finish(False)
+
+def plan_reuse(upload, local, current, known, remote_root, unavailable=()):
+    """Pick a server-side source for each file to upload whose content the server has
+    
+    Sources are files in the live tree (from the remote hashes) or, failing
+    that, locations the package store recorded for this host. Live paths in
+    `unavailable` are about to be replaced and cannot serve as a source.
+    """
+    live = {}
+    for path, digest in current.items():
+        if path not in unavailable:
+            live.setdefault(digest, f"{remote_root}/{path}")
+    reuse = {}
+    for path in upload:
+        source = live.get(local[path]) or known.get(local[path])
+        if source and not (source.startswith(remote_root + "/")
+                           and source[len(remote_root) + 1:] in unavailable):
+            reuse[path] = source
+    return reuse
+
+def reuse_remote_blobs(ssh, reuse, local, target_root, link=False):
+    """Copy files the server already holds into place in one remote command
+    
+    Each source is checked against the expected hash first, since recorded
+    locations can be pruned or edited. With link=True the copy is a hard
+    link where possible. Returns the paths that still need uploading.
+    """
+    lines = []
+    for path, source in sorted(reuse.items()):
+        src = shlex.quote(source)
+        dst = shlex.quote(f"{target_root}/{path}")
+        place = f"{{ ln {src} {dst} || cp -p {src} {dst}; }}" if link else f"cp -p {src} {dst}"
+        lines.append(f"{{ printf '%s  %s\\n' {local[path]} {src} | sha256sum -c --status && {place}; }} "
+                     f">/dev/null 2>&1 || echo {shlex.quote(path)}")
+    stdin, stdout, stderr = ssh.exec_command("bash -s")
+    stdin.write("\n".join(lines) + "\n")
+    stdin.channel.shutdown_write()
+    missed = [line.strip() for line in stdout.read().decode().splitlines() if line.strip()]
+    stdout.channel.recv_exit_status()
+    return missed
+
+def list_releases(ssh):
+    """Releases on the server, oldest first, as (id, KB it adds), plus the live release id
+    
+    du counts a hard-linked file once, in the first release holding it, so
+    each size is what that release adds to the ones before it. The live
+    release id is "" until CURRENT_LINK exists.
+    """
+    cmd = (f"if [ -L {CURRENT_LINK} ]; then basename \"$(readlink -f {CURRENT_LINK})\"; else echo; fi; "
+           f"cd {RELEASES_DIR} 2>/dev/null || exit 0; "
+           f"ls -1 | grep -E '{RELEASE_ID_PATTERN}' | sort | xargs -r du -sk")
+    stdin, stdout, stderr = ssh.exec_command(cmd)
+    lines = stdout.read().decode().splitlines()
+    stdout.channel.recv_exit_status()
+    current = lines[0].strip() if lines else ""
+    releases = []
+    for line in lines[1:]:
+        size, _, release_id = line.partition("\t")
+        if release_id:
+            releases.append((release_id.strip(), int(size)))
+    return releases, current
+
+def print_releases(hostname=HOSTNAME):
+    """Show the retained releases of a host and the disk they use"""
+    ssh = connect(hostname)
+    releases, current = list_releases(ssh)
+    ssh.close()
+    print(f"📚 Releases on {hostname} (oldest first):")
+    for release_id, size in releases:
+        marker = "▶" if release_id == current else " "
+        print(f"   {marker} {release_id}  +{size / 1024:.1f} MB")
+    total = sum(size for _, size in releases)
+    print(f"   {len(releases)} releases, {total / 1024:.1f} MB on disk "
+          f"(keeping {RELEASES_KEEP} within {RELEASES_BUDGET_MB} MB)")
+    return True
+
+def rollback_release(target="previous", hostname=HOSTNAME):
+    """Point the docroot back at a retained release
+    
+    This is the same atomic symlink switch a deploy ends with, so it takes
+    the same time however large the release is. `target` is a release id
+    or "previous" for the newest release older than the live one.
+    """
+    
+    print("⏪ EzEdit.co Rollback")
+    print("====================")
+    print(f"Server: {hostname}")
+    print("")
+    
+    timer = DeployTimer("rollback", hostname)
+    try:
+        with timer.phase("connect"):
+            ssh = connect(hostname)
+        with timer.phase("inspect"):
+            releases, current = list_releases(ssh)
+        ids = [release_id for release_id, _ in releases]
+        if target == "previous":
+            older = [release_id for release_id in ids if release_id < current]
+            if not older:
+                print(f"❌ No release older than '{current or 'the live tree'}' is retained")
+                return timer.finish(False)
+            target = older[-1]
+        elif target not in ids:
+            print(f"❌ Release '{target}' not found (retained: {', '.join(ids) or 'none'})")
+            return timer.finish(False)
+        if target == current:
+            print(f"✅ {target} is already live")
+            return timer.finish(True)
+        
+        timer.release = target
+        release_dir = f"{RELEASES_DIR}/{target}"
+        print(f"🔄 Switching {current or 'nothing'} -> {target}")
+        commands = [
+            step("prepare", f"test -d {release_dir}"),
+            *release_switch_steps(release_dir, prune=False),
+            step("reload", "systemctl reload nginx 2>/dev/null || true"),
+        ]
+        with timer.phase("switch"):
+            results = run_remote_script(ssh, commands)
+        timer.add_remote_steps("switch", results)
+        ssh.close()
+        if not steps_succeeded(results):
+            print(f"❌ Step failed: {results[-1]['step'] if results else 'remote shell'}")
+            return timer.finish(False)
+        
+        print(f"✅ Rolled back to {target}")
+        return timer.finish(True)
+    
+    except Exception as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        return timer.finish(False)
+
+def record_deploy(store, hostname, package_dir, remote_root, files, pruned=()):
+    """Keep the deployed version in the package store and note what the host now holds
+    
+    Locations inside the `pruned` releases are forgotten, so later deploys
+    never plan to reuse a file from a release that has been removed.
+    """
+    try:
+        store.add_directory(package_dir, f"{hostname}-{new_release_id()}")
+        for release_id in pruned:
+            store.forget_target_paths(hostname, f"{RELEASES_DIR}/{release_id}")
+        store.record_target(hostname, remote_root, files)
+    except OSError as e:
+        print(f"⚠️ Could not update the package store: {e}")
+
+class _HostPrefixedOutput:
+    """stdout wrapper that prefixes each line with the host its thread is deploying"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
+    
+    def write(self, data):
+        host = getattr(self.local, "host", None)
+        if host is None:
+            with self.lock:
+                return self.stream.write(data)
+        pending = getattr(self.local, "pending", "") + data
+        *lines, self.local.pending = pending.split("\n")
+        with self.lock:
+            for line in lines:
+                self.stream.write(f"[{host}] {line}\n")
+        return len(data)
+    
+    def flush(self):
+        self.stream.flush()
+
+def load_inventory(path):
+    """Read hosts from an inventory file: one per line, # starts a comment"""
+    hosts = []
+    with open(path) as f:
+        for line in f:
+            host = line.split("#", 1)[0].strip()
+            if host and host not in hosts:
+                hosts.append(host)
+    return hosts
+
+def probe_health(hostname, paths=HEALTH_CHECK_PATHS, timeout=HEALTH_TIMEOUT):
+    """None when every health-check page answers HTTP 200, else what failed
+    
+    A JSON answer (health.php) must also report a healthy status.
+    """
+    import urllib.error
+    import urllib.request
+    for path in paths:
+        try:
+            url = site_url(hostname, path)
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                body = response.read()
+                if response.status != 200:
+                    return f"{path}: HTTP {response.status}"
+                if "json" in response.headers.get("Content-Type", ""):
+                    status = json.loads(body).get("status")
+                    if status not in (None, "healthy", "ok"):
+                        return f"{path}: status '{status}'"
+        except urllib.error.HTTPError as e:
+            return f"{path}: HTTP {e.code}"
+        except Exception as e:
+            return f"{path}: {e}"
+    return None
+
+def check_host_health(hostname, paths=HEALTH_CHECK_PATHS, timeout=10):
+    """True when every health-check page on the host answers HTTP 200"""
+    return probe_health(hostname, paths, timeout) is None
+
+def wait_for_healthy(hostname, deadline=HEALTH_DEADLINE, paths=HEALTH_CHECK_PATHS):
+    """Poll a host until it is healthy or `deadline` seconds have passed
+    
+    The gap between polls grows by half each time, from HEALTH_MIN_INTERVAL
+    to HEALTH_MAX_INTERVAL, so a release that comes up quickly is seen
+    quickly and a slow one isn't hammered. Returns (healthy, seconds, polls,
+    last problem).
+    """
+    started = time.monotonic()
+    interval = HEALTH_MIN_INTERVAL
+    polls = 0
+    while True:
+        polls += 1
+        problem = probe_health(hostname, paths)
+        elapsed = time.monotonic() - started
+        if problem is None:
+            return True, elapsed, polls, None
+        if elapsed >= deadline:
+            return False, elapsed, polls, problem
+        time.sleep(min(interval, deadline - elapsed))
+        interval = min(interval * 1.5, HEALTH_MAX_INTERVAL)
+
+def health_gated(deploy, hostname=HOSTNAME, deadline=HEALTH_DEADLINE, rollback=True):
+    """Run deploy(hostname), then hold the new release to the health gate
+    
+    Time-to-healthy is recorded as the "health" phase of a "health" timing
+    run. A release that isn't healthy by the deadline is rolled back to the
+    release that was live before the deploy, and the time until the site is
+    healthy again is recorded as "recovery".
+    """
+    before = ""
+    if rollback:
+        try:
+            ssh = connect(hostname)
+            releases, current = list_releases(ssh)
+            ssh.close()
+            # Only a retained release can be rolled back to (not, say, the
+            # plain docroot a first deploy replaces)
+            if current in [release_id for release_id, _ in releases]:
+                before = current
+        except Exception as e:
+            print(f"⚠️ Could not read the live release, automatic rollback is off: {e}")
+    
+    if not deploy(hostname):
+        return False
+    
+    timer = DeployTimer("health", hostname)
+    print(f"🩺 Waiting up to {deadline}s for {hostname} to pass its health checks...")
+    with timer.phase("health") as span:
+        healthy, seconds, polls, problem = wait_for_healthy(hostname, deadline)
+        span["polls"] = polls
+        span["healthy"] = healthy
+    if healthy:
+        print(f"💚 Healthy after {seconds:.2f}s ({polls} polls)")
+        return timer.finish(True)
+    
+    print(f"🚨 Not healthy after {seconds:.1f}s ({polls} polls): {problem}")
+    if not before:
+        print("❌ No previous release to roll back to, fix forward")
+        return timer.finish(False)
+    
+    print(f"⏪ Rolling back to {before}...")
+    started = time.monotonic()
+    with timer.phase("rollback"):
+        rolled_back = rollback_release(before, hostname)
+    if rolled_back:
+        with timer.phase("recovery") as span:
+            recovered, _, polls, problem = wait_for_healthy(hostname, deadline)
+            span["polls"] = polls
+            span["healthy"] = recovered
+        recovery = time.monotonic() - started
+        if recovered:
+            print(f"💚 Healthy again {recovery:.2f}s after the rollback started")
+        else:
+            print(f"🚨 Still unhealthy {recovery:.1f}s after rolling back: {problem}")
+    return timer.finish(False)
+
+def deploy_fleet(hosts, deploy, parallel=FLEET_PARALLEL, batch_size=None, health_check=True):
+    """Deploy to many hosts concurrently, optionally in health-gated rolling batches
+    
+    `deploy` is called as deploy(hostname) and returns True on success. Each
+    batch deploys with up to `parallel` hosts at once; the next batch starts
+    only when every host of the current one deployed and passed its health
+    check. Returns {host: (status, seconds)}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    batch_size = batch_size or len(hosts)
+    batches = [hosts[i:i + batch_size] for i in range(0, len(hosts), batch_size)]
+    results = {host: ("skipped", 0.0) for host in hosts}
+    output = _HostPrefixedOutput(sys.stdout)
+    
+    def run(host):
+        output.local.host = host
+        started = time.monotonic()
+        try:
+            ok = deploy(host)
+        except Exception as e:
+            print(f"❌ Deployment failed: {e}")
+            ok = False
+        finally:
+            output.local.host = None
+        return ok, time.monotonic() - started
+    
+    sys.stdout = output
+    try:
+        for number, batch in enumerate(batches, 1):
+            print(f"🚚 Batch {number}/{len(batches)}: {', '.join(batch)}")
+            with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(batch)))) as pool:
+                outcomes = dict(zip(batch, pool.map(run, batch)))
+            
+            healthy = True
+            for host, (ok, seconds) in outcomes.items():
+                if not ok:
+                    results[host] = ("failed", seconds)
+                    healthy = False
+                elif health_check and not check_host_health(host):
+                    results[host] = ("unhealthy", seconds)
+                    healthy = False
+                else:
+                    results[host] = ("ok", seconds)
+            
+            if not healthy and number < len(batches):
+                print(f"🛑 Batch {number} did not pass its health checks, stopping the rollout")
+                break
+    finally:
+        sys.stdout = output.stream
+    
+    print_fleet_summary(results)
+    return results
+
+def print_fleet_summary(results):
+    """Print one line per host with its deploy outcome and duration"""
+    icons = {"ok": "✅", "failed": "❌", "unhealthy": "⚠️", "skipped": "⏭️"}
+    print("")
+    print("📋 Fleet summary:")
+    for host, (status, seconds) in results.items():
+        print(f"   {icons[status]} {host:<20} {status:<10} {seconds:7.2f}s  {site_url(host)}")
+    ok = sum(1 for status, _ in results.values() if status == "ok")
+    print(f"   {ok}/{len(results)} hosts deployed")
+    print("")
 
 if __name__ == "__main__":
-    success = deploy_to_server()
+    parser = argparse.ArgumentParser(description="Deploy EzEdit.co to the DigitalOcean server")
+    parser.add_argument("--delta", action="store_true",
+                        help=f"upload only the files in {PACKAGE_DIR} that differ from the server")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="with --delta, show the plan without changing anything")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream the package into a remote tar without temporary archives")
+    parser.add_argument("--in-place", action="store_true",
+                        help="with --delta, patch the live tree instead of creating a release")
+    parser.add_argument("--channels", type=int, default=SFTP_CHANNELS,
+                        help="SFTP channels per SSH connection used for uploads")
+    parser.add_argument("--connections", type=int, default=SFTP_CONNECTIONS,
+                        help="SSH connections used for uploads")
+    parser.add_argument("--inventory", help="file listing the hosts to deploy to, one per line")
+    parser.add_argument("--hosts", help="comma-separated hosts to deploy to")
+    parser.add_argument("--parallel", type=int, default=FLEET_PARALLEL,
+                        help="hosts deployed at the same time")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="roll out in batches of this many hosts, health-checking each batch")
+    parser.add_argument("--no-health-check", action="store_true",
+                        help="don't health-check hosts between rolling batches")
+    parser.add_argument("--control", action="store_true",
+                        help="keep the SSH connection open behind a control socket for later runs")
+    parser.add_argument("--metrics-dir", default=None,
+                        help="where deploy timings go (JSON lines and Prometheus textfile)")
+    parser.add_argument("--releases", action="store_true",
+                        help="list the releases retained on the server and exit")
+    parser.add_argument("--rollback", nargs="?", const="previous", default=None, metavar="RELEASE",
+                        help="switch back to a retained release (default: the one before the live one)")
+    parser.add_argument("--keep", type=int, default=RELEASES_KEEP,
+                        help="releases to retain after a deploy")
+    parser.add_argument("--budget-mb", type=int, default=RELEASES_BUDGET_MB,
+                        help="disk budget for all retained releases together")
+    parser.add_argument("--health-deadline", type=float, default=HEALTH_DEADLINE,
+                        help="seconds a new release has to pass its health checks before it is rolled back")
+    parser.add_argument("--no-health-gate", action="store_true",
+                        help="don't wait for the health checks (or roll back) after deploying")
+    args = parser.parse_args()
+    
+    RELEASES_KEEP = max(RELEASES_MIN, args.keep)
+    RELEASES_BUDGET_MB = max(1, args.budget_mb)
+    
+    if args.control:
+        get_pool().control = True
+    if args.metrics_dir:
+        import deploy_timing
+        deploy_timing.METRICS_DIR = args.metrics_dir
+    
+    hosts = []
+    if args.inventory:
+        hosts.extend(load_inventory(args.inventory))
+    if args.hosts:
+        hosts.extend(h.strip() for h in args.hosts.split(",") if h.strip() and h.strip() not in hosts)
+    
+    # Hosts deploy concurrently, so a fleet shares one staged copy
+    stage = len(hosts) <= 1
+    if not stage and (args.stream or args.delta):
+        stage_package(PACKAGE_DIR)
+    package_dir = PACKAGE_DIR if stage else STAGING_DIR
+    
+    if args.releases:
+        sys.exit(0 if all(print_releases(host) for host in hosts or [HOSTNAME]) else 1)
+    
+    if args.rollback:
+        deploy = lambda host: rollback_release(args.rollback, host)
+    elif args.stream:
+        deploy = lambda host: deploy_stream(package_dir, hostname=host, stage=stage)
+    elif args.delta:
+        deploy = lambda host: deploy_delta(package_dir, dry_run=args.dry_run, release=not args.in_place,
+                                           channels=args.channels,
+                                           connections=args.connections, hostname=host,
+                                           stage=stage)
+    else:
+        package = build_package(PACKAGE_DIR, DEPLOYMENT_FILE) if len(hosts) > 1 else None
+        deploy = lambda host: deploy_to_server(channels=args.channels, connections=args.connections,
+                                               hostname=host, package=package)
+    
+    if not (args.rollback or args.dry_run or args.no_health_gate):
+        # An in-place delta patches the live release, so there is nothing to roll back to
+        ungated = deploy
+        deploy = lambda host: health_gated(ungated, host, args.health_deadline,
+                                           rollback=not (args.delta and args.in_place))
+    
+    if len(hosts) > 1:
+        results = deploy_fleet(hosts, deploy, args.parallel, args.batch_size,
+                               health_check=not args.no_health_check)
+        success = all(status == "ok" for status, _ in results.values())
+    else:
+        success = deploy(hosts[0] if hosts else HOSTNAME)
     sys.exit(0 if success else 1)
\ No newline at end of file
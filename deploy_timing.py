@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co Deploy Timing
+Timing spans for each deploy phase and remote step, written as JSON lines
+and as a Prometheus textfile-collector file
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Point this (or EZEDIT_METRICS_DIR) at node_exporter's textfile directory to
+# have Prometheus scrape the .prom files (one per host and mode, so a
+# rollback or health gate doesn't replace the gauges of the deploy before it)
+METRICS_DIR = os.environ.get("EZEDIT_METRICS_DIR", ".deploy-metrics")
+SPANS_FILE = "deploy-spans.jsonl"
+
+_write_lock = threading.Lock()
+
+class RemoteStep(str):
+    """A remote shell step carrying the timing phase it belongs to"""
+
+    phase = None
+
+def step(phase, command):
+    """Tag a shell step with its phase for DeployTimer.add_remote_steps"""
+    tagged = RemoteStep(command)
+    tagged.phase = phase
+    return tagged
+
+def step_phase(command):
+    """The phase a remote shell step was tagged with, or None (progress echoes) if untagged"""
+    return getattr(command, "phase", None)
+
+class DeployTimer:
+    """Spans of one deploy: top-level phases plus the remote steps inside them"""
+
+    def __init__(self, mode, host, release=None):
+        self.mode = mode
+        self.host = host
+        self.release = release
+        self.deploy_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{host}-{mode}"
+        self.started = time.monotonic()
+        self.timestamp = time.time()
+        self.spans = []
+
+    @contextmanager
+    def phase(self, name, **attributes):
+        """Time a block; the yielded span can be given bytes and other attributes"""
+        span = {"phase": name, "bytes": 0, **attributes}
+        start = time.monotonic()
+        span["start"] = round(start - self.started, 6)
+        try:
+            yield span
+            span["status"] = "ok"
+        except Exception:
+            span["status"] = "error"
+            raise
+        finally:
+            span["seconds"] = round(time.monotonic() - start, 6)
+            self.spans.append(span)
+
+    def add_remote_steps(self, parent, results):
+        """Record run_remote_script() results as steps of a phase
+
+        Only steps tagged with step() are recorded, under their own phase.
+        """
+        for result in results:
+            phase = step_phase(result["step"])
+            if phase is None:
+                continue
+            self.spans.append({
+                "phase": phase,
+                "parent": parent,
+                "step": result["step"],
+                "seconds": round(result["seconds"], 6),
+                "status": "ok" if result["status"] == 0 else "error",
+                "bytes": 0,
+            })
+
+    def totals(self, steps=False):
+        """Seconds and bytes per phase (top-level phases, or remote step phases)"""
+        totals = {}
+        for span in self.spans:
+            if ("parent" in span) != steps:
+                continue
+            seconds, size = totals.get(span["phase"], (0.0, 0))
+            totals[span["phase"]] = (seconds + span["seconds"], size + span.get("bytes", 0))
+        return totals
+
+    def finish(self, success, metrics_dir=None):
+        """Write the spans out, print a summary and return `success`"""
+        duration = time.monotonic() - self.started
+        metrics_dir = Path(metrics_dir or METRICS_DIR)
+        try:
+            self.write_spans(metrics_dir / SPANS_FILE, success, duration)
+            self.write_prometheus(metrics_dir / f"ezedit_deploy_{_slug(self.host)}_{_slug(self.mode)}.prom",
+                                  success, duration)
+        except OSError as e:
+            print(f"⚠️ Could not write deploy timings: {e}")
+        self.print_summary(duration)
+        return success
+
+    def write_spans(self, path, success, duration):
+        """Append one JSON line per span and one for the whole deploy"""
+        common = {"deploy": self.deploy_id, "host": self.host, "mode": self.mode,
+                  "release": self.release}
+        lines = [json.dumps({**common, **span}, sort_keys=True) for span in self.spans]
+        lines.append(json.dumps({**common, "phase": "total", "seconds": round(duration, 6),
+                                 "status": "ok" if success else "error",
+                                 "timestamp": self.timestamp,
+                                 "bytes": sum(size for _, size in self.totals().values())},
+                                sort_keys=True))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _write_lock, open(path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def write_prometheus(self, path, success, duration):
+        """Replace the host and mode's textfile with the gauges of this deploy"""
+        labels = f'host="{_escape(self.host)}",mode="{_escape(self.mode)}"'
+        out = [
+            "# HELP ezedit_deploy_duration_seconds Wall-clock seconds of the last deploy",
+            "# TYPE ezedit_deploy_duration_seconds gauge",
+            f"ezedit_deploy_duration_seconds{{{labels}}} {duration:.6f}",
+            "# HELP ezedit_deploy_success Whether the last deploy succeeded",
+            "# TYPE ezedit_deploy_success gauge",
+            f"ezedit_deploy_success{{{labels}}} {1 if success else 0}",
+            "# HELP ezedit_deploy_timestamp_seconds Unix time the last deploy started",
+            "# TYPE ezedit_deploy_timestamp_seconds gauge",
+            f"ezedit_deploy_timestamp_seconds{{{labels}}} {self.timestamp:.3f}",
+            "# HELP ezedit_deploy_phase_seconds Seconds spent in each phase of the last deploy",
+            "# TYPE ezedit_deploy_phase_seconds gauge",
+        ]
+        phases = self.totals()
+        for phase, (seconds, _) in phases.items():
+            out.append(f'ezedit_deploy_phase_seconds{{{labels},phase="{phase}"}} {seconds:.6f}')
+        out += [
+            "# HELP ezedit_deploy_phase_bytes Bytes moved in each phase of the last deploy",
+            "# TYPE ezedit_deploy_phase_bytes gauge",
+        ]
+        for phase, (_, size) in phases.items():
+            out.append(f'ezedit_deploy_phase_bytes{{{labels},phase="{phase}"}} {size}')
+        out += [
+            "# HELP ezedit_deploy_step_seconds Remote-measured seconds per kind of remote step",
+            "# TYPE ezedit_deploy_step_seconds gauge",
+        ]
+        for phase, (seconds, _) in self.totals(steps=True).items():
+            out.append(f'ezedit_deploy_step_seconds{{{labels},step="{phase}"}} {seconds:.6f}')
+
+        # Written beside the target and renamed so the collector never reads half a file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(out) + "\n")
+        os.replace(tmp_path, path)
+
+    def print_summary(self, duration):
+        print("⏱️ Deploy phases:")
+        for phase, (seconds, size) in self.totals().items():
+            moved = f" {size / 1024:.1f} KB" if size else ""
+            print(f"   {seconds:7.3f}s {phase}{moved}")
+        steps = self.totals(steps=True)
+        if steps:
+            print("   remote: " + ", ".join(f"{phase} {seconds:.3f}s" for phase, (seconds, _) in steps.items()))
+        print(f"   {duration:7.3f}s total")
+        print("")
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co Drift Detection
+Compares the package with the live docroot through per-directory hash trees:
+the server hashes its docroot once, then only the children of directories
+whose hashes differ are sent back, one round trip per level
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shlex
+import sys
+import time
+
+from deploy import HOSTNAME, RELEASE_SHARED_PATHS, REMOTE_ROOT, connect
+from package_builder import PACKAGE_DIR, STAGING_DIR, stage_package
+
+HASH_CHUNK_SIZE = 65536
+
+def hash_tree(root, ignore=()):
+    """Hash a directory tree bottom-up
+
+    Files hash to the SHA-256 of their content, symlinks to that of their
+    target and directories to the SHA-256 of their sorted "kind hash name"
+    lines. Relative paths in `ignore` are left out, as if absent. Returns
+    (root hash, {directory: {name: [kind, hash]}}) with "" for the root,
+    or (None, {}) if root is not a directory.
+    """
+    tree = {}
+
+    def digest_file(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def walk(path, relative):
+        children = {}
+        for entry in sorted(os.scandir(path), key=lambda e: e.name):
+            child = f"{relative}/{entry.name}" if relative else entry.name
+            if child in ignore:
+                continue
+            if entry.is_symlink():
+                target = os.readlink(entry.path).encode("utf-8", "surrogateescape")
+                children[entry.name] = ["l", hashlib.sha256(target).hexdigest()]
+            elif entry.is_dir():
+                children[entry.name] = ["d", walk(entry.path, child)]
+            elif entry.is_file():
+                children[entry.name] = ["f", digest_file(entry.path)]
+        tree[relative] = children
+        listing = "".join(f"{kind} {value} {name}\n" for name, (kind, value) in sorted(children.items()))
+        return hashlib.sha256(listing.encode("utf-8", "surrogateescape")).hexdigest()
+
+    root = os.path.realpath(root)
+    if not os.path.isdir(root):
+        return None, {}
+    return walk(root, ""), tree
+
+def _serve(root, ignore=()):
+    """Remote side: hash the tree, print the root hash, then answer queries
+
+    Each query is a JSON list of directories on one line; the answer is one
+    line mapping each to its children. An empty list ends the session.
+    """
+    root_hash, tree = hash_tree(root, set(ignore))
+    files = sum(1 for children in tree.values() for kind, _ in children.values() if kind != "d")
+    print(json.dumps({"root": root_hash, "files": files}), flush=True)
+    for line in sys.stdin:
+        directories = json.loads(line)
+        if not directories:
+            break
+        print(json.dumps({directory: tree.get(directory, {}) for directory in directories}), flush=True)
+
+def remote_script():
+    """The Python program run on the server (cloud-init images ship python3)"""
+    return "\n".join([
+        "import hashlib, json, os, sys",
+        f"HASH_CHUNK_SIZE = {HASH_CHUNK_SIZE}",
+        inspect.getsource(hash_tree),
+        inspect.getsource(_serve),
+        "_serve(sys.argv[1], json.loads(sys.argv[2]))",
+    ])
+
+class RemoteTree:
+    """The server's hash tree, queried a level at a time over one channel
+
+    Server-only files (RELEASE_SHARED_PATHS by default) are left out, since
+    the package never holds them.
+    """
+
+    def __init__(self, ssh, remote_root=REMOTE_ROOT, ignore=RELEASE_SHARED_PATHS):
+        command = (f"python3 -c {shlex.quote(remote_script())} {shlex.quote(remote_root)} "
+                   f"{shlex.quote(json.dumps(sorted(ignore)))}")
+        self.stdin, self.stdout, self.stderr = ssh.exec_command(command)
+        self.received = 0
+        self.round_trips = 0
+        header = self._read()
+        if header is None:
+            error = self.stderr.read()
+            error = error.decode(errors="replace") if isinstance(error, bytes) else error
+            raise RuntimeError(error.strip() or "remote hashing failed")
+        self.root = header["root"]
+        self.files = header["files"]
+
+    def _read(self):
+        line = self.stdout.readline()
+        line = line.decode() if isinstance(line, bytes) else line
+        self.received += len(line)
+        self.round_trips += 1
+        return json.loads(line) if line.strip() else None
+
+    def children(self, directories):
+        """{directory: {name: [kind, hash]}} for each of the directories"""
+        self.stdin.write(json.dumps(directories) + "\n")
+        self.stdin.flush()
+        return self._read() or {}
+
+    def close(self):
+        try:
+            self.stdin.write("[]\n")
+            self.stdin.flush()
+            self.stdin.channel.shutdown_write()
+            self.stdout.channel.recv_exit_status()
+        except OSError:
+            pass
+
+def find_drift(local_root, local_tree, remote):
+    """Walk both trees top-down, descending only where directory hashes differ
+
+    Returns a list of (change, path) with change "modified", "missing" (in
+    the package, not on the server) or "extra" (only on the server); a whole
+    missing or extra directory is reported once, with a trailing slash.
+    """
+    if remote.root is None:
+        return [("missing", "/")]
+    if local_root == remote.root:
+        return []
+    drift = []
+    frontier = [""]
+    while frontier:
+        remote_children = remote.children(frontier)
+        next_frontier = []
+        for directory in frontier:
+            mine = local_tree.get(directory, {})
+            theirs = remote_children.get(directory, {})
+            for name in sorted(set(mine) | set(theirs)):
+                ours, other = mine.get(name), theirs.get(name)
+                if ours == other:
+                    continue
+                path = f"{directory}/{name}" if directory else name
+                if ours is None:
+                    drift.append(("extra", path + ("/" if other[0] == "d" else "")))
+                elif other is None:
+                    drift.append(("missing", path + ("/" if ours[0] == "d" else "")))
+                elif ours[0] == "d" and other[0] == "d":
+                    next_frontier.append(path)
+                else:
+                    drift.append(("modified", path))
+        frontier = next_frontier
+    return drift
+
+def check_drift(package_dir, hostname=HOSTNAME, remote_root=REMOTE_ROOT):
+    """Print what differs between package_dir and the server; returns True if nothing does"""
+    started = time.monotonic()
+    local_root, local_tree = hash_tree(package_dir, set(RELEASE_SHARED_PATHS))
+    local_files = sum(1 for children in local_tree.values() for kind, _ in children.values() if kind != "d")
+    print(f"📦 Local tree: {local_files} files, root {local_root[:12]}")
+
+    ssh = connect(hostname)
+    remote = RemoteTree(ssh, remote_root)
+    try:
+        if remote.root is not None:
+            print(f"🌐 Remote tree: {remote.files} files, root {remote.root[:12]}")
+        drift = find_drift(local_root, local_tree, remote)
+    finally:
+        remote.close()
+        ssh.close()
+
+    icons = {"modified": "~", "missing": "+", "extra": "-"}
+    for change, path in drift:
+        print(f"   {icons[change]} {path} ({change})")
+    elapsed = time.monotonic() - started
+    summary = (f"{remote.round_trips} round trips, {remote.received / 1024:.1f} KB received, "
+               f"{elapsed:.2f}s")
+    if drift:
+        print(f"⚠️ {len(drift)} differences between {package_dir} and {hostname}:{remote_root} ({summary})")
+        print("   ~ modified, + missing on the server, - only on the server")
+    else:
+        print(f"✅ No drift: {hostname}:{remote_root} matches {package_dir} ({summary})")
+    return not drift
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect drift between the package and the live docroot")
+    parser.add_argument("--source", default=None,
+                        help=f"directory to compare (default: {PACKAGE_DIR}, staged into {STAGING_DIR})")
+    parser.add_argument("--host", default=HOSTNAME, help="server to compare against")
+    parser.add_argument("--remote-root", default=REMOTE_ROOT, help="docroot on the server")
+    args = parser.parse_args()
+
+    print("🔍 EzEdit.co Drift Detection")
+    print("============================")
+
+    source = args.source
+    if source is None:
+        # Compare what a deploy would ship: fingerprinted and precompressed
+        stage_package(PACKAGE_DIR)
+        source = STAGING_DIR
+    if not os.path.isdir(source):
+        print(f"❌ Source directory '{source}' not found!")
+        return False
+    try:
+        return check_drift(source, args.host, args.remote_root)
+    except Exception as e:
+        print(f"❌ Drift check failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
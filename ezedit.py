@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co command line
+One entry point for the build, deploy, validation and upload tools
+
+Each subcommand runs the existing script with the remaining arguments, so
+nothing heavier than the standard library is imported until a subcommand
+is chosen, and only that subcommand's dependencies are imported then.
+"""
+
+import os
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# subcommand -> (script, summary)
+COMMANDS = {
+    "build": ("package_builder.py", "build the reproducible deployment tarball"),
+    "deploy": ("deploy.py", "deploy the package to the droplet (full, --delta or --stream)"),
+    "validate": ("validate-deployment.py", "validate a deployment, or load-test it (--benchmark, --journey)"),
+    "smoke": ("test-deployment.py", "quick smoke test of the main pages"),
+    "upload-helper": ("upload-deployer.py", "create and explain the deploy helper uploader"),
+    "upload-editor": ("upload-editor.py", "prepare an editor.php upload"),
+    "upload-api": ("upload-via-api.py", "check the droplet and print API upload options"),
+    "push": ("http_upload.py", "push changed files over HTTP through the batch uploader"),
+    "drift": ("drift.py", "find out-of-band changes between the package and the live docroot"),
+    "store": ("package_store.py", "content-addressed package store"),
+    "history": ("bench_history.py", "benchmark history and regression gating"),
+    "harness": ("offline_harness.py", "offline SSH/SFTP and HTTP stand-ins"),
+}
+
+def usage():
+    print("usage: ezedit [--time] <command> [args...]")
+    print("")
+    print("EzEdit.co deployment tooling")
+    print("")
+    print("commands:")
+    width = max(len(name) for name in COMMANDS)
+    for name, (_, summary) in COMMANDS.items():
+        print(f"  {name:<{width}}  {summary}")
+    print("")
+    print("Run 'ezedit <command> --help' for a command's options. --time reports")
+    print("how long the command took, imports included, on stderr.")
+
+def run_script(path):
+    """Run a script as __main__, like runpy.run_path but leaving sys.argv[0] alone
+
+    run_path sets argv[0] to the script's path, which would make argparse
+    call the program 'deploy.py' instead of 'ezedit deploy'.
+    """
+    with open(path, "rb") as f:
+        code = compile(f.read(), path, "exec")
+    module = types.ModuleType("__main__")
+    module.__file__ = path
+    saved = sys.modules.get("__main__")
+    sys.modules["__main__"] = module
+    try:
+        exec(code, module.__dict__)
+    finally:
+        sys.modules["__main__"] = saved
+
+def run(command, args, timed=False):
+    """Run a subcommand's script as __main__ and return its exit status"""
+    script, _ = COMMANDS[command]
+    # The tools use paths relative to the checkout (deployment-package/, dist/, ...)
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sys.argv = [f"ezedit {command}", *args]
+    modules = len(sys.modules)
+    started = time.perf_counter()
+    status = 0
+    try:
+        run_script(os.path.join(ROOT, script))
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        if timed:
+            elapsed = time.perf_counter() - started
+            print(f"⏱️ {command}: {elapsed * 1000:.1f}ms including imports "
+                  f"({len(sys.modules) - modules} modules loaded)", file=sys.stderr)
+    return status
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    timed = False
+    if argv and argv[0] == "--time":
+        timed = True
+        argv = argv[1:]
+    if not argv or argv[0] in ("-h", "--help"):
+        usage()
+        return 0
+    if argv[0] not in COMMANDS:
+        print(f"❌ Unknown command '{argv[0]}'", file=sys.stderr)
+        usage()
+        return 2
+    return run(argv[0], argv[1:], timed)
+
+if __name__ == "__main__":
+    sys.exit(main())
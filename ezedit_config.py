@@ -0,0 +1,19 @@
+"""
+EzEdit.co tooling configuration
+The droplet every script talks to, overridable from the environment
+(offline_harness.py prints the values that point the tools at it)
+"""
+
+import os
+
+DROPLET_IP = os.environ.get("EZEDIT_HOST", "159.65.224.175")
+SSH_PORT = int(os.environ.get("EZEDIT_SSH_PORT", 22))
+SSH_PASSWORD = os.environ.get("EZEDIT_SSH_PASSWORD", "MattKaylaS2two")
+HTTP_PORT = int(os.environ.get("EZEDIT_HTTP_PORT", 80))
+BASE_URL = os.environ.get(
+    "EZEDIT_BASE_URL", f"http://{DROPLET_IP}" + ("" if HTTP_PORT == 80 else f":{HTTP_PORT}"))
+
+# Everything deploys under this directory on the server
+REMOTE_BASE = os.environ.get("EZEDIT_REMOTE_BASE", "/var/www")
+# Scratch directory on the server for uploaded packages and staged manifests
+REMOTE_TMP = os.environ.get("EZEDIT_REMOTE_TMP", "/tmp")
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co HTTP Uploader
+Pushes files through batch-uploader.php when SSH is not available: each
+batch is one POST of a gzip-compressed tar streamed from disk, several
+batches run at once, and the receiver answers with the SHA-256 of every
+file it wrote so each write is confirmed
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tarfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ezedit_config import BASE_URL, REMOTE_BASE
+from package_builder import FILE_MODE, PACKAGE_DIR, STAGING_DIR, file_sha256, package_mtime, stage_package
+
+RECEIVER_NAME = "batch-uploader.php"
+UPLOAD_URL = f"{BASE_URL}/{RECEIVER_NAME}"
+REMOTE_ROOT = f"{REMOTE_BASE}/html"
+
+# The receiver only accepts requests whose X-Upload-Token hashes to the
+# SHA-256 stored in this file (outside the docroot, so it is never served)
+TOKEN_FILE = f"{REMOTE_BASE}/.ezedit-upload-token"
+TOKEN = os.environ.get("EZEDIT_UPLOAD_TOKEN")
+
+# A batch closes at whichever limit it reaches first
+BATCH_BYTES = 4 * 1024 * 1024
+BATCH_FILES = 200
+PARALLEL = 4
+CHUNK_SIZE = 65536
+RETRIES = 2
+
+# Hashes of what each receiver last confirmed, so only changes are pushed
+UPLOAD_STATE_FILE = ".upload-state.json"
+
+# Reads the tar from php://input through zlib as it arrives, writes each
+# file beside its target and renames it into place (releases share inodes
+# through hard links, so files are never rewritten in place)
+RECEIVER_PHP = r'''<?php
+// Batch uploader for EzEdit.co deployments (generated by http_upload.py)
+// POST a gzip-compressed tar with X-Upload-Token; replies with the size and
+// SHA-256 of every file written
+$root = '__ROOT__';
+$token_file = '__TOKEN_FILE__';
+
+header('Content-Type: application/json');
+$expected = is_readable($token_file) ? trim(file_get_contents($token_file)) : '';
+$token = isset($_SERVER['HTTP_X_UPLOAD_TOKEN']) ? $_SERVER['HTTP_X_UPLOAD_TOKEN'] : '';
+if ($_SERVER['REQUEST_METHOD'] !== 'POST' || $expected === '' || !hash_equals($expected, hash('sha256', $token))) {
+    http_response_code(403);
+    echo json_encode(['error' => 'forbidden']);
+    exit;
+}
+
+function read_exact($in, $length) {
+    $data = '';
+    while (strlen($data) < $length && !feof($in)) {
+        $chunk = fread($in, min(65536, $length - strlen($data)));
+        if ($chunk === false || $chunk === '') {
+            break;
+        }
+        $data .= $chunk;
+    }
+    return $data;
+}
+
+function copy_member($in, $out, $size, $ctx) {
+    $written = 0;
+    while ($written < $size) {
+        $chunk = read_exact($in, min(65536, $size - $written));
+        if ($chunk === '') {
+            break;
+        }
+        if ($out !== null) {
+            fwrite($out, $chunk);
+            hash_update($ctx, $chunk);
+        }
+        $written += strlen($chunk);
+    }
+    return $written;
+}
+
+$in = fopen('compress.zlib://php://input', 'rb');
+$files = [];
+while (true) {
+    $header = read_exact($in, 512);
+    if (strlen($header) < 512 || trim($header, "\0") === '') {
+        break;
+    }
+    $name = rtrim(substr($header, 0, 100), "\0");
+    $prefix = rtrim(substr($header, 345, 155), "\0");
+    if ($prefix !== '') {
+        $name = $prefix . '/' . $name;
+    }
+    $size = octdec(trim(substr($header, 124, 12), "\0 "));
+    $type = substr($header, 156, 1);
+    $padding = (512 - $size % 512) % 512;
+
+    $unsafe = $name === '' || $name[0] === '/' || preg_match('#(^|/)\.\.(/|$)#', $name);
+    if ($unsafe || ($type !== '0' && $type !== "\0")) {
+        copy_member($in, null, $size + $padding, null);
+        if ($unsafe) {
+            $files[] = ['path' => $name, 'error' => 'unsafe path'];
+        }
+        continue;
+    }
+
+    $target = $root . '/' . $name;
+    $dir = dirname($target);
+    if (!is_dir($dir) && !mkdir($dir, 0755, true)) {
+        copy_member($in, null, $size + $padding, null);
+        $files[] = ['path' => $name, 'error' => 'cannot create directory'];
+        continue;
+    }
+    $tmp = $dir . '/.' . basename($target) . '.upload-' . getmypid();
+    $out = fopen($tmp, 'wb');
+    $ctx = hash_init('sha256');
+    $written = copy_member($in, $out, $size, $ctx);
+    fclose($out);
+    copy_member($in, null, $padding, null);
+    if ($written !== $size) {
+        unlink($tmp);
+        $files[] = ['path' => $name, 'error' => "truncated at $written of $size bytes"];
+        break;
+    }
+    chmod($tmp, 0644);
+    if (!rename($tmp, $target)) {
+        unlink($tmp);
+        $files[] = ['path' => $name, 'error' => 'rename failed'];
+        continue;
+    }
+    $files[] = ['path' => $name, 'size' => $written, 'sha256' => hash_final($ctx)];
+}
+fclose($in);
+echo json_encode(['files' => $files]);
+'''
+
+def receiver_source(root=REMOTE_ROOT, token_file=TOKEN_FILE):
+    """batch-uploader.php for a docroot and token file"""
+    return RECEIVER_PHP.replace("__ROOT__", root).replace("__TOKEN_FILE__", token_file)
+
+def write_receiver(path=RECEIVER_NAME, root=REMOTE_ROOT, token_file=TOKEN_FILE):
+    with open(path, "w") as f:
+        f.write(receiver_source(root, token_file))
+    return path
+
+def _tar_header(relative, size):
+    info = tarfile.TarInfo(relative)
+    info.size = size
+    info.mode = FILE_MODE
+    info.mtime = package_mtime()
+    return info.tobuf(tarfile.USTAR_FORMAT, "utf-8", "strict")
+
+def batch_body(files, hashes, stats, chunk_size=CHUNK_SIZE):
+    """The gzip-compressed tar of a batch, generated while reading the files
+
+    Each file is read once, in chunks, and hashed on the way into `hashes`;
+    `stats` collects the bytes read ("raw") and sent ("wire").
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def emit(data):
+        compressed = compressor.compress(data)
+        stats["wire"] += len(compressed)
+        return compressed
+
+    for relative, path in files:
+        size = os.path.getsize(path)
+        yield emit(_tar_header(relative, size))
+        digest = hashlib.sha256()
+        remaining = size
+        with open(path, "rb") as f:
+            while remaining:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise OSError(f"{path} shrank while uploading")
+                remaining -= len(chunk)
+                digest.update(chunk)
+                stats["raw"] += len(chunk)
+                yield emit(chunk)
+        hashes[relative] = digest.hexdigest()
+        yield emit(b"\0" * (-size % 512))
+    yield emit(b"\0" * 1024)
+    tail = compressor.flush()
+    stats["wire"] += len(tail)
+    yield tail
+
+def _nonempty(chunks):
+    # An empty chunk would end a chunked request body early
+    return (chunk for chunk in chunks if chunk)
+
+def split_batches(files, batch_bytes=BATCH_BYTES, batch_files=BATCH_FILES):
+    """Group (relative, path) pairs into batches, largest files first"""
+    ordered = sorted(files, key=lambda item: os.path.getsize(item[1]), reverse=True)
+    batches = []
+    current = []
+    current_bytes = 0
+    for relative, path in ordered:
+        size = os.path.getsize(path)
+        if current and (current_bytes + size > batch_bytes or len(current) >= batch_files):
+            batches.append(current)
+            current = []
+            current_bytes = 0
+        current.append((relative, path))
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+def upload_batch(session, url, token, files, timeout=60):
+    """POST one batch; returns ({path: sha256} confirmed, {path: error}, stats)"""
+    hashes = {}
+    stats = {"raw": 0, "wire": 0}
+    try:
+        response = session.post(url, data=_nonempty(batch_body(files, hashes, stats)), timeout=timeout,
+                                headers={"X-Upload-Token": token, "Content-Type": "application/gzip"})
+        if response.status_code != 200:
+            reason = f"HTTP {response.status_code}"
+            return {}, {relative: reason for relative, _ in files}, stats
+        written = {row["path"]: row for row in response.json().get("files", [])}
+    except (requests.RequestException, OSError, ValueError) as e:
+        return {}, {relative: str(e) for relative, _ in files}, stats
+
+    confirmed = {}
+    failed = {}
+    for relative, _ in files:
+        row = written.get(relative)
+        if row is None:
+            failed[relative] = "not written"
+        elif "error" in row:
+            failed[relative] = row["error"]
+        elif row.get("sha256") != hashes.get(relative):
+            failed[relative] = "hash mismatch"
+        else:
+            confirmed[relative] = row["sha256"]
+    return confirmed, failed, stats
+
+def upload_files(files, url=UPLOAD_URL, token=TOKEN, parallel=PARALLEL, batch_bytes=BATCH_BYTES,
+                 retries=RETRIES):
+    """Upload (relative, path) pairs in parallel batches, retrying failed files
+
+    Returns ({path: sha256} confirmed, {path: last error}, stats).
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=parallel, pool_maxsize=parallel)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    paths = dict(files)
+    confirmed = {}
+    failed = {}
+    stats = {"raw": 0, "wire": 0, "batches": 0}
+    pending = list(files)
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        for attempt in range(retries + 1):
+            if not pending:
+                break
+            if attempt:
+                print(f"🔄 Retrying {len(pending)} files...")
+            batches = split_batches(pending, batch_bytes)
+            stats["batches"] += len(batches)
+            failed = {}
+            for done, errors, batch_stats in pool.map(lambda batch: upload_batch(session, url, token, batch),
+                                                      batches):
+                confirmed.update(done)
+                failed.update(errors)
+                stats["raw"] += batch_stats["raw"]
+                stats["wire"] += batch_stats["wire"]
+            # A rejected token or missing receiver won't change on retry
+            pending = [(relative, paths[relative]) for relative, error in failed.items()
+                       if not error.startswith("HTTP 4")]
+    session.close()
+    return confirmed, failed, stats
+
+def package_files(package_dir):
+    """(relative, path) for every file under a directory"""
+    pairs = []
+    for base, _, names in os.walk(package_dir):
+        for name in sorted(names):
+            path = os.path.join(base, name)
+            pairs.append((os.path.relpath(path, package_dir).replace(os.sep, "/"), path))
+    return sorted(pairs)
+
+def load_upload_state(path=UPLOAD_STATE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_upload_state(state, path=UPLOAD_STATE_FILE):
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Push files to the droplet over HTTP through "
+                                                 f"{RECEIVER_NAME}")
+    parser.add_argument("paths", nargs="*", help="files to push, relative to --source (default: changed files)")
+    parser.add_argument("--source", default=None,
+                        help=f"directory to push from (default: {PACKAGE_DIR}, staged into {STAGING_DIR})")
+    parser.add_argument("--all", action="store_true", help="push every file, not only changed ones")
+    parser.add_argument("--url", default=UPLOAD_URL, help="receiver URL")
+    parser.add_argument("--parallel", type=int, default=PARALLEL, help="batches uploaded at the same time")
+    parser.add_argument("--batch-size", type=int, default=BATCH_BYTES // 1024, help="batch size limit in KB")
+    parser.add_argument("--write-receiver", action="store_true",
+                        help=f"write {RECEIVER_NAME} for installing on the server and exit")
+    args = parser.parse_args()
+
+    print("📤 EzEdit.co HTTP Uploader")
+    print("==========================")
+
+    if args.write_receiver:
+        write_receiver()
+        print(f"✅ Created {RECEIVER_NAME} (writes to {REMOTE_ROOT})")
+        print(f"   Install it in {REMOTE_ROOT} and store the token's hash outside the docroot:")
+        print(f"   echo -n \"$EZEDIT_UPLOAD_TOKEN\" | sha256sum | cut -d' ' -f1 | sudo tee {TOKEN_FILE}")
+        return True
+
+    if not TOKEN:
+        print("❌ Set EZEDIT_UPLOAD_TOKEN to the receiver's upload token")
+        return False
+
+    source = args.source
+    if source is None:
+        stage_package(PACKAGE_DIR)
+        source = STAGING_DIR
+    if not os.path.isdir(source):
+        print(f"❌ Source directory '{source}' not found!")
+        return False
+
+    state = load_upload_state()
+    uploaded = state.setdefault(args.url, {})
+    if args.paths:
+        files = [(p.replace(os.sep, "/"), os.path.join(source, p)) for p in args.paths]
+        missing = [relative for relative, path in files if not os.path.isfile(path)]
+        if missing:
+            print(f"❌ Not in {source}: {', '.join(missing)}")
+            return False
+    else:
+        files = package_files(source)
+        if not args.all:
+            files = [(relative, path) for relative, path in files if uploaded.get(relative) != file_sha256(path)]
+    if not files:
+        print(f"✅ Nothing to push, {args.url} has every file")
+        return True
+
+    total = sum(os.path.getsize(path) for _, path in files)
+    print(f"📦 {len(files)} files ({total / 1024:.1f} KB) to {args.url}")
+    started = time.monotonic()
+    confirmed, failed, stats = upload_files(files, args.url, TOKEN, max(1, args.parallel),
+                                            max(1, args.batch_size) * 1024)
+    elapsed = time.monotonic() - started
+
+    uploaded.update(confirmed)
+    save_upload_state(state)
+    for relative, error in sorted(failed.items()):
+        print(f"   ❌ {relative}: {error}")
+    print(f"{'✅' if not failed else '⚠️'} {len(confirmed)}/{len(files)} files confirmed by hash in "
+          f"{elapsed:.2f}s ({stats['batches']} batches, {stats['wire'] / 1024:.1f} KB sent for "
+          f"{stats['raw'] / 1024:.1f} KB)")
+    return not failed
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,655 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co Offline Harness
+Local stand-ins for the droplet: an SSH/SFTP server that runs commands against
+a temp directory and an HTTP server for the package, so deploy.py,
+validate-deployment.py and test-deployment.py can run without a network
+"""
+
+import argparse
+import errno
+import hashlib
+import ipaddress
+import json
+import mimetypes
+import os
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import paramiko
+from paramiko import SFTPAttributes, SFTPHandle, SFTPServer, SFTPServerInterface
+
+from package_builder import FINGERPRINT_PATTERN
+
+PACKAGE_DIR = "deployment-package/public_html"
+BIND_ADDRESS = "127.0.0.1"
+SSH_PORT = 2222
+HTTP_PORT = 8080
+
+# Index files tried, in order, for requests that name a directory
+INDEX_FILES = ["index.php", "index.html"]
+
+# Precompressed siblings served like nginx's brotli_static / gzip_static
+STATIC_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# Sent for fingerprinted assets (name.<hash>.css/js), like the nginx rule
+# documented in package_builder.py
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Pending connections the HTTP stand-in queues; socketserver's default of 5
+# overflows under the validation and load-test concurrency, and clients then
+# stall for a SYN retransmit (about 1s)
+HTTP_LISTEN_BACKLOG = 128
+
+# POSTs here are handled like http_upload.py's batch-uploader.php
+UPLOAD_RECEIVER = "/batch-uploader.php"
+
+# Commands that would touch the real machine (or need root) are replaced by
+# these scripts on the stand-in's PATH
+ALWAYS_STUBBED = {
+    "systemctl": "#!/bin/sh\nexit 0\n",
+}
+NON_ROOT_STUBBED = {
+    "chown": "#!/bin/sh\nexit 0\n",
+    "tar": '#!/bin/sh\nexec {tar} "$@" --no-same-owner\n',
+}
+
+class _SFTPHandle(SFTPHandle):
+    def stat(self):
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def chattr(self, attr):
+        try:
+            if attr.st_mode is not None:
+                os.fchmod(self.readfile.fileno(), attr.st_mode & 0o7777)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+class _SFTPInterface(SFTPServerInterface):
+    """SFTP onto the local filesystem, confined to the stand-in's root
+
+    Absolute paths are used as given (the tools send paths inside the root)
+    and relative ones are taken from the root; anything that resolves
+    outside it is refused with EACCES.
+    """
+
+    def __init__(self, server, root, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = os.path.realpath(root)
+
+    def _local(self, path, follow=True):
+        """The local path for an SFTP path; follow=False leaves a final symlink unresolved"""
+        path = os.path.join(self.root, path)
+        if follow:
+            resolved = os.path.realpath(path)
+        else:
+            resolved = os.path.join(os.path.realpath(os.path.dirname(path)), os.path.basename(path))
+        if os.path.commonpath([resolved, self.root]) != self.root:
+            raise PermissionError(errno.EACCES, "outside the harness root", path)
+        return resolved
+
+    def _call(self, func, *paths, follow=False, extra=()):
+        try:
+            func(*(self._local(path, follow) for path in paths), *extra)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def list_folder(self, path):
+        try:
+            path = self._local(path)
+            entries = []
+            for name in os.listdir(path):
+                attr = SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)))
+                attr.filename = name
+                entries.append(attr)
+            return entries
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.lstat(self._local(path, follow=False)))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def open(self, path, flags, attr):
+        mode = attr.st_mode & 0o7777 if attr is not None and attr.st_mode is not None else 0o644
+        try:
+            path = self._local(path)
+            fd = os.open(path, flags | getattr(os, "O_BINARY", 0), mode)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        if flags & os.O_WRONLY:
+            fmode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            fmode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            fmode = "rb"
+        f = os.fdopen(fd, fmode)
+        handle = _SFTPHandle(flags)
+        handle.filename = path
+        handle.readfile = f
+        handle.writefile = f
+        return handle
+
+    def remove(self, path):
+        return self._call(os.remove, path)
+
+    def rename(self, oldpath, newpath):
+        try:
+            if os.path.lexists(self._local(newpath, follow=False)):
+                return paramiko.SFTP_FAILURE
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return self._call(os.rename, oldpath, newpath)
+
+    def posix_rename(self, oldpath, newpath):
+        return self._call(os.replace, oldpath, newpath)
+
+    def mkdir(self, path, attr):
+        mode = attr.st_mode & 0o7777 if attr is not None and attr.st_mode is not None else 0o755
+        return self._call(os.mkdir, path, extra=(mode,))
+
+    def rmdir(self, path):
+        return self._call(os.rmdir, path)
+
+    def chattr(self, path, attr):
+        if attr.st_mode is not None:
+            return self._call(os.chmod, path, follow=True, extra=(attr.st_mode & 0o7777,))
+        return paramiko.SFTP_OK
+
+    def symlink(self, target_path, path):
+        try:
+            os.symlink(target_path, self._local(path, follow=False))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def readlink(self, path):
+        try:
+            return os.readlink(self._local(path, follow=False))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def canonicalize(self, path):
+        return os.path.normpath(path if path.startswith("/") else "/" + path)
+
+class _SSHInterface(paramiko.ServerInterface):
+    """Accepts the stand-in's password and runs exec requests through it"""
+
+    def __init__(self, server):
+        self.server = server
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if secrets.compare_digest(password.encode(), self.server.password.encode()):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_REQUEST
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.server.run_command,
+                         args=(channel, command.decode()), daemon=True).start()
+        return True
+
+class SSHStandIn:
+    """In-process SSH/SFTP server whose commands run in a temp directory
+
+    Commands run with bash in `root` on this machine, so the remote paths
+    deploy.py uses must be pointed inside it (EZEDIT_REMOTE_BASE and
+    EZEDIT_REMOTE_TMP do that); SFTP is confined to it. Logins need
+    `password`, a random one unless given. systemctl is always a no-op;
+    when not running as root, so are chown and tar's ownership changes.
+    """
+
+    def __init__(self, root, port=SSH_PORT, bind=BIND_ADDRESS, latency=0.0, password=None):
+        self.root = Path(root)
+        self.bind = bind
+        self.latency = latency
+        self.password = password or secrets.token_urlsafe(16)
+        self.key = paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((bind, port))
+        self.port = self.sock.getsockname()[1]
+        self.stub_dir = self.root / ".harness-bin"
+        self.transports = []
+        self._thread = None
+        self._closed = threading.Event()
+
+    def _write_stubs(self):
+        self.stub_dir.mkdir(parents=True, exist_ok=True)
+        stubs = dict(ALWAYS_STUBBED)
+        if hasattr(os, "geteuid") and os.geteuid() != 0:
+            stubs.update(NON_ROOT_STUBBED)
+        for name, script in stubs.items():
+            path = self.stub_dir / name
+            path.write_text(script.format(tar=shutil.which("tar") or "/bin/tar"))
+            path.chmod(0o755)
+
+    def start(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._write_stubs()
+        self.sock.listen(50)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def _serve(self):
+        while not self._closed.is_set():
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.key)
+            transport.set_subsystem_handler("sftp", SFTPServer, _SFTPInterface, self.root)
+            try:
+                transport.start_server(server=_SSHInterface(self))
+            except (paramiko.SSHException, EOFError):
+                continue
+            self.transports.append(transport)
+
+    def run_command(self, channel, command):
+        if self.latency:
+            time.sleep(self.latency)
+        env = dict(os.environ, PATH=f"{self.stub_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+        process = subprocess.Popen(["bash", "-c", command], cwd=self.root, env=env,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+
+        def feed():
+            try:
+                for data in iter(lambda: channel.recv(32768), b""):
+                    process.stdin.write(data)
+                    process.stdin.flush()
+            except (OSError, ValueError):
+                pass
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        def errors():
+            for data in iter(lambda: process.stderr.read1(32768), b""):
+                channel.sendall_stderr(data)
+
+        threads = [threading.Thread(target=feed, daemon=True),
+                   threading.Thread(target=errors, daemon=True)]
+        for thread in threads:
+            thread.start()
+        for data in iter(lambda: process.stdout.read1(32768), b""):
+            channel.sendall(data)
+        threads[1].join()
+        channel.send_exit_status(process.wait())
+        channel.close()
+
+    def close(self):
+        self._closed.set()
+        self.sock.close()
+        for transport in self.transports:
+            transport.close()
+
+class _ChunkedReader:
+    """File-like reader of a Transfer-Encoding: chunked request body"""
+
+    def __init__(self, rfile):
+        self.rfile = rfile
+        self.remaining = 0
+        self.done = False
+
+    def read(self, size=-1):
+        out = b""
+        while not self.done and (size < 0 or len(out) < size):
+            if not self.remaining:
+                self.remaining = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if not self.remaining:
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    self.done = True
+                    break
+            data = self.rfile.read(self.remaining if size < 0 else min(self.remaining, size - len(out)))
+            if not data:
+                self.done = True
+                break
+            out += data
+            self.remaining -= len(data)
+            if not self.remaining:
+                self.rfile.readline()
+        return out
+
+class _LimitedReader:
+    def __init__(self, rfile, length):
+        self.rfile = rfile
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.rfile.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    server_version = "EzEditHarness/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _resolve(self):
+        docroot = Path(self.server.docroot()).resolve()
+        relative = unquote(urlsplit(self.path).path).lstrip("/")
+        path = (docroot / relative).resolve()
+        if path != docroot and docroot not in path.parents:
+            return None
+        if path.is_dir():
+            for name in INDEX_FILES:
+                if (path / name).is_file():
+                    return path / name
+            return None
+        return path if path.is_file() else None
+
+    def _respond(self, body=True):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+        content_type = "text/html" if path.suffix == ".php" else (
+            mimetypes.guess_type(path.name)[0] or "application/octet-stream")
+        accepted = [value.split(";")[0].strip() for value in
+                    self.headers.get("Accept-Encoding", "").split(",")]
+        immutable = FINGERPRINT_PATTERN.search(path.name) is not None
+        encoding = None
+        for name, suffix in STATIC_ENCODINGS:
+            if name in accepted and path.with_name(path.name + suffix).is_file():
+                encoding = name
+                path = path.with_name(path.name + suffix)
+                break
+        stat = path.stat()
+        # Same validators nginx sends: hex mtime-size ETag and Last-Modified
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        if self._not_modified(etag, int(stat.st_mtime)):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if immutable:
+            self.send_header("Cache-Control", IMMUTABLE_CACHE_CONTROL)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(stat.st_size))
+        self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if body:
+            with open(path, "rb") as f:
+                self._send_throttled(f)
+
+    def _not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_throttled(self, f):
+        bandwidth = self.server.bandwidth
+        chunk_size = max(1024, int(bandwidth / 20)) if bandwidth else 65536
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            started = time.monotonic()
+            self.wfile.write(chunk)
+            if bandwidth:
+                delay = len(chunk) / bandwidth - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+    def do_GET(self):
+        self._respond()
+
+    def do_HEAD(self):
+        self._respond(body=False)
+
+    def do_POST(self):
+        if urlsplit(self.path).path == UPLOAD_RECEIVER and self.server.upload_token:
+            self._receive_batch()
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self._respond()
+
+    def _receive_batch(self):
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            body = _ChunkedReader(self.rfile)
+        else:
+            body = _LimitedReader(self.rfile, int(self.headers.get("Content-Length") or 0))
+        if not secrets.compare_digest(self.headers.get("X-Upload-Token", ""), self.server.upload_token):
+            while body.read(65536):
+                pass
+            self._send_json(403, {"error": "forbidden"})
+            return
+
+        root = Path(self.server.upload_root())
+        files = []
+        with tarfile.open(fileobj=body, mode="r|gz") as tar:
+            for member in tar:
+                name = member.name
+                if name.startswith("/") or ".." in name.split("/"):
+                    files.append({"path": name, "error": "unsafe path"})
+                    continue
+                if not member.isfile():
+                    continue
+                target = root / name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(f".{target.name}.upload-{os.getpid()}")
+                digest = hashlib.sha256()
+                source = tar.extractfile(member)
+                with open(tmp, "wb") as out:
+                    for chunk in iter(lambda: source.read(65536), b""):
+                        out.write(chunk)
+                        digest.update(chunk)
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, target)
+                files.append({"path": name, "size": member.size, "sha256": digest.hexdigest()})
+            while body.read(65536):
+                pass
+        self._send_json(200, {"files": files})
+
+    def _send_json(self, status, data):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+class _HTTPServer(ThreadingHTTPServer):
+    request_queue_size = HTTP_LISTEN_BACKLOG
+    daemon_threads = True
+
+class HTTPStandIn:
+    """Threaded HTTP server for a docroot, with added latency and a bandwidth cap
+
+    `docroot` may be a callable so a release symlink is followed per request.
+    PHP files are served as their source, which still carries the markup the
+    validation scripts look for. With an upload_token, POSTs to
+    batch-uploader.php write into upload_root (default: the docroot).
+    """
+
+    def __init__(self, docroot=PACKAGE_DIR, port=HTTP_PORT, bind=BIND_ADDRESS,
+                 latency=0.0, bandwidth=0, verbose=False, upload_token=None, upload_root=None):
+        self.httpd = _HTTPServer((bind, port), _HTTPHandler)
+        self.httpd.docroot = docroot if callable(docroot) else (lambda: docroot)
+        self.httpd.latency = latency
+        self.httpd.bandwidth = bandwidth
+        self.httpd.verbose = verbose
+        self.httpd.upload_token = upload_token
+        self.httpd.upload_root = upload_root or self.httpd.docroot
+        self.port = self.httpd.server_address[1]
+        self.base_url = f"http://{bind}:{self.port}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def is_loopback(address):
+    """True for addresses only this machine can reach"""
+    if address == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(address).is_loopback
+    except ValueError:
+        return False
+
+class Harness:
+    """Both stand-ins plus the environment that points the tools at them
+
+    The SSH stand-in is a shell on this machine, so binding anywhere but
+    loopback needs allow_remote=True.
+    """
+
+    def __init__(self, root=None, ssh_port=SSH_PORT, http_port=HTTP_PORT, bind=BIND_ADDRESS,
+                 docroot=PACKAGE_DIR, serve_deployed=False, latency=0.0, bandwidth=0,
+                 ssh_latency=0.0, verbose=False, allow_remote=False):
+        if not allow_remote and not is_loopback(bind):
+            raise ValueError(f"refusing to bind the stand-ins to {bind} without allow_remote")
+        self._tempdir = None
+        if root is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix="ezedit-harness-")
+            root = self._tempdir.name
+        self.root = Path(root)
+        self.remote_base = self.root / "var" / "www"
+        self.remote_tmp = self.root / "tmp"
+        self.ssh = SSHStandIn(self.root, ssh_port, bind, ssh_latency)
+        served = (lambda: self.remote_base / "html") if serve_deployed else docroot
+        # Uploads land where the receiver on the droplet would put them
+        self.upload_token = secrets.token_hex(16)
+        self.http = HTTPStandIn(served, http_port, bind, latency, bandwidth, verbose,
+                                self.upload_token, lambda: self.remote_base / "html")
+        self.bind = bind
+
+    def environ(self):
+        return {
+            "EZEDIT_HOST": self.bind,
+            "EZEDIT_SSH_PORT": str(self.ssh.port),
+            "EZEDIT_SSH_PASSWORD": self.ssh.password,
+            "EZEDIT_HTTP_PORT": str(self.http.port),
+            "EZEDIT_REMOTE_BASE": str(self.remote_base),
+            "EZEDIT_REMOTE_TMP": str(self.remote_tmp),
+            "EZEDIT_BASE_URL": self.http.base_url,
+            "EZEDIT_UPLOAD_TOKEN": self.upload_token,
+        }
+
+    def start(self):
+        self.remote_base.mkdir(parents=True, exist_ok=True)
+        self.remote_tmp.mkdir(parents=True, exist_ok=True)
+        self.ssh.start()
+        self.http.start()
+        return self
+
+    def close(self):
+        self.http.close()
+        self.ssh.close()
+        if self._tempdir:
+            self._tempdir.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline SSH/SFTP and HTTP stand-ins for EzEdit.co")
+    parser.add_argument("--root", help="directory the SSH stand-in works in (default: a temp dir)")
+    parser.add_argument("--bind", default=BIND_ADDRESS, help="address to listen on")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="allow a --bind address other machines can reach")
+    parser.add_argument("--ssh-port", type=int, default=SSH_PORT, help="SSH/SFTP port (0 picks one)")
+    parser.add_argument("--http-port", type=int, default=HTTP_PORT, help="HTTP port (0 picks one)")
+    parser.add_argument("--docroot", default=PACKAGE_DIR, help="directory served over HTTP")
+    parser.add_argument("--serve-deployed", action="store_true",
+                        help="serve what deploy.py activated instead of --docroot")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added before every HTTP response")
+    parser.add_argument("--bandwidth", type=float, default=0,
+                        help="HTTP response bandwidth cap in KB/s per connection (0: unlimited)")
+    parser.add_argument("--ssh-latency", type=float, default=0.0,
+                        help="seconds added before every remote command")
+    parser.add_argument("--verbose", action="store_true", help="log every HTTP request")
+    args = parser.parse_args()
+
+    if not args.allow_remote and not is_loopback(args.bind):
+        parser.error(f"--bind {args.bind} exposes a shell on this machine; add --allow-remote to do it anyway")
+
+    harness = Harness(args.root, args.ssh_port, args.http_port, args.bind, args.docroot,
+                      args.serve_deployed, args.latency, args.bandwidth * 1024,
+                      args.ssh_latency, args.verbose, args.allow_remote)
+    harness.start()
+
+    print("🧪 EzEdit.co Offline Harness")
+    print("============================")
+    print(f"🔐 SSH/SFTP: {args.bind}:{harness.ssh.port} (root {harness.root})")
+    print(f"🌐 HTTP:     {harness.http.base_url}")
+    print("")
+    print("Point the tools at it with:")
+    for name, value in harness.environ().items():
+        print(f"  export {name}={value}")
+    print("")
+    print("Press Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n👋 Stopping")
+    finally:
+        harness.close()
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co Deployment Package Builder
+Builds a reproducible deploy tarball from deployment-package/public_html
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tarfile
+from pathlib import Path
+
+PACKAGE_DIR = "deployment-package/public_html"
+OUTPUT_FILE = "dist/ezedit-deployment.tar.gz"
+
+# What actually ships: a copy of the package with fingerprinted assets and
+# compressed siblings, so the source tree is never modified by a build
+STAGING_DIR = "dist/public_html"
+ASSET_MANIFEST = "dist/asset-manifest.json"
+
+# Everything in the archive sits under this directory (deploy.py strips it)
+ARCHIVE_ROOT = "public_html"
+
+# Final on-server state, baked into the archive so extraction needs no chmod/chown pass
+DIR_MODE = 0o755
+FILE_MODE = 0o644
+OWNER_UID = 33
+OWNER_GID = 33
+OWNER_NAME = "www-data"
+
+# Fixed timestamp for every entry unless SOURCE_DATE_EPOCH is set
+DEFAULT_MTIME = 1753315200  # 2025-07-24 00:00:00 UTC
+
+# Text assets at least this large get .gz (and, with a brotli module, .br)
+# siblings for nginx's gzip_static / brotli_static to serve
+PRECOMPRESS_EXTENSIONS = {".css", ".js", ".svg", ".json", ".html", ".txt", ".xml"}
+PRECOMPRESS_MIN_SIZE = 1024
+
+# Assets copied to name.<hash>.ext and referenced by that name from pages.
+# The server should send far-future headers for those names only, e.g. nginx:
+#   location ~* "\.[0-9a-f]{10}\.(css|js)$" {
+#       add_header Cache-Control "public, max-age=31536000, immutable";
+#   }
+FINGERPRINT_EXTENSIONS = {".css", ".js"}
+FINGERPRINT_LENGTH = 10
+FINGERPRINT_PATTERN = re.compile(r"\.[0-9a-f]{%d}\.(css|js)$" % FINGERPRINT_LENGTH)
+REFERENCE_EXTENSIONS = {".php", ".html"}
+_REFERENCE = re.compile(r"""(\b(?:href|src)\s*=\s*["'])([^"'?#]+)""")
+
+def file_sha256(path, chunk_size=65536):
+    """Hash a file in chunks so large assets are never fully loaded"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_manifest(package_dir=PACKAGE_DIR):
+    """Map every file in the package to its SHA-256, keyed by relative path"""
+    root = Path(package_dir)
+    manifest = {}
+    for path in sorted(root.rglob("*")):
+        if path.is_file():
+            manifest[path.relative_to(root).as_posix()] = file_sha256(path)
+    return manifest
+
+def _brotli():
+    """The brotli encoder module if one is installed, else None"""
+    for name in ("brotli", "brotlicffi"):
+        try:
+            return __import__(name)
+        except ImportError:
+            continue
+    return None
+
+def fingerprint_name(relative, digest):
+    """css/main.css + digest -> css/main.<hash>.css"""
+    stem, ext = os.path.splitext(relative)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+def _rewrite_references(text, page, assets):
+    """Point a page's href/src attributes at the fingerprinted asset names"""
+
+    def replace(match):
+        value = match.group(2)
+        if "://" in value or value.startswith(("//", "data:", "mailto:")) or "<?" in value or "$" in value:
+            return match.group(0)
+        if value.startswith("/"):
+            target = value.lstrip("/")
+        else:
+            target = os.path.normpath(os.path.join(os.path.dirname(page), value)).replace(os.sep, "/")
+        if target not in assets:
+            return match.group(0)
+        prefix = value[:len(value) - len(os.path.basename(value))]
+        return match.group(1) + prefix + os.path.basename(assets[target])
+
+    return _REFERENCE.sub(replace, text)
+
+def fingerprint_assets(package_dir=STAGING_DIR):
+    """Add content-hashed copies of the CSS/JS and rewrite pages to use them
+
+    The original names stay in place for anything not rewritten (other
+    scripts, bookmarks, old cached pages). Returns {original: fingerprinted}.
+    """
+    root = Path(package_dir)
+    assets = {}
+    for path in package_entries(package_dir):
+        if path.is_file() and path.suffix in FINGERPRINT_EXTENSIONS and not FINGERPRINT_PATTERN.search(path.name):
+            relative = path.relative_to(root).as_posix()
+            assets[relative] = fingerprint_name(relative, file_sha256(path))
+    for relative, fingerprinted in assets.items():
+        shutil.copyfile(root / relative, root / fingerprinted)
+
+    for path in package_entries(package_dir):
+        if not path.is_file() or path.suffix not in REFERENCE_EXTENSIONS:
+            continue
+        text = path.read_text(encoding="utf-8", errors="surrogateescape")
+        rewritten = _rewrite_references(text, path.relative_to(root).as_posix(), assets)
+        if rewritten != text:
+            path.write_text(rewritten, encoding="utf-8", errors="surrogateescape")
+    return assets
+
+def stage_package(package_dir=PACKAGE_DIR, staging_dir=STAGING_DIR, asset_manifest=ASSET_MANIFEST,
+                  compress_assets=True):
+    """Copy the package to staging_dir and prepare it for shipping
+
+    Assets are fingerprinted (with {original: fingerprinted} written to
+    asset_manifest) and, unless compress_assets is False, precompressed.
+    Returns (assets, precompress report).
+    """
+    if os.path.isdir(staging_dir):
+        shutil.rmtree(staging_dir)
+    shutil.copytree(package_dir, staging_dir)
+    assets = fingerprint_assets(staging_dir)
+    os.makedirs(os.path.dirname(asset_manifest) or ".", exist_ok=True)
+    with open(asset_manifest, "w") as f:
+        json.dump({"assets": assets}, f, indent=2, sort_keys=True)
+        f.write("\n")
+    report = precompress(staging_dir) if compress_assets else {}
+    return assets, report
+
+def load_asset_manifest(path=ASSET_MANIFEST):
+    """{original: fingerprinted} from the last build, or {} if there is none"""
+    try:
+        with open(path) as f:
+            return json.load(f)["assets"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def precompress(package_dir=STAGING_DIR, min_size=PRECOMPRESS_MIN_SIZE):
+    """Write compressed siblings of the package's text assets
+
+    Output is deterministic (gzip mtime 0, no name) and files are only
+    rewritten when their content changes; siblings whose source is gone or
+    no longer qualifies are removed. Returns {path: {"size", ".gz", ".br"}}.
+    """
+    root = Path(package_dir)
+    encoders = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    brotli = _brotli()
+    if brotli is not None:
+        encoders[".br"] = lambda data: brotli.compress(data, quality=11)
+
+    report = {}
+    wanted = set()
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix not in PRECOMPRESS_EXTENSIONS:
+            continue
+        data = path.read_bytes()
+        if len(data) < min_size:
+            continue
+        row = {"size": len(data)}
+        for suffix, encode in encoders.items():
+            compressed = encode(data)
+            if len(compressed) >= len(data):
+                continue
+            target = path.with_name(path.name + suffix)
+            if not target.is_file() or target.read_bytes() != compressed:
+                target.write_bytes(compressed)
+            wanted.add(target)
+            row[suffix] = len(compressed)
+        report[path.relative_to(root).as_posix()] = row
+
+    for suffix in (".gz", ".br"):
+        for path in root.rglob(f"*{suffix}"):
+            source = path.with_name(path.name[:-len(suffix)])
+            if source.suffix in PRECOMPRESS_EXTENSIONS and path not in wanted:
+                path.unlink()
+    return report
+
+def print_precompress_report(report):
+    """Per-asset and total sizes before and after compression"""
+    if not report:
+        return
+    total = sum(row["size"] for row in report.values())
+    gz = sum(row.get(".gz", row["size"]) for row in report.values())
+    br = sum(row.get(".br", row.get(".gz", row["size"])) for row in report.values())
+    print("📉 Precompressed assets:")
+    for path, row in report.items():
+        sizes = ", ".join(f"{suffix[1:]} {row[suffix] / 1024:.1f} KB" for suffix in (".gz", ".br") if suffix in row)
+        print(f"   {path}: {row['size'] / 1024:.1f} KB -> {sizes}")
+    line = f"   Total: {total / 1024:.1f} KB -> gz {gz / 1024:.1f} KB ({100 - gz * 100 / total:.0f}% smaller)"
+    if any(".br" in row for row in report.values()):
+        line += f", br {br / 1024:.1f} KB ({100 - br * 100 / total:.0f}% smaller)"
+    print(line)
+
+def package_mtime():
+    """The timestamp stamped on every archive entry"""
+    return int(os.environ.get("SOURCE_DATE_EPOCH", DEFAULT_MTIME))
+
+def package_entries(package_dir=PACKAGE_DIR):
+    """Directories and regular files of the package in a stable order"""
+    root = Path(package_dir)
+    entries = []
+    for path in sorted(root.rglob("*"), key=lambda p: p.relative_to(root).as_posix()):
+        if path.is_dir() or path.is_file():
+            entries.append(path)
+    return entries
+
+def _tarinfo(name, mtime, is_dir, size=0):
+    info = tarfile.TarInfo(name)
+    info.type = tarfile.DIRTYPE if is_dir else tarfile.REGTYPE
+    info.mode = DIR_MODE if is_dir else FILE_MODE
+    info.size = 0 if is_dir else size
+    info.mtime = mtime
+    info.uid = OWNER_UID
+    info.gid = OWNER_GID
+    info.uname = OWNER_NAME
+    info.gname = OWNER_NAME
+    return info
+
+class _HashingReader:
+    """File wrapper that hashes what tarfile reads, so each file is read once"""
+
+    def __init__(self, f, digest):
+        self.f = f
+        self.digest = digest
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.digest.update(data)
+        return data
+
+def write_package_tar(tar, package_dir=PACKAGE_DIR, mtime=None):
+    """Add the package to an open tarfile with normalised metadata
+
+    Returns the manifest of the files written.
+    """
+    mtime = package_mtime() if mtime is None else mtime
+    root = Path(package_dir)
+    manifest = {}
+    tar.addfile(_tarinfo(ARCHIVE_ROOT, mtime, True))
+    for path in package_entries(package_dir):
+        relative = path.relative_to(root).as_posix()
+        name = f"{ARCHIVE_ROOT}/{relative}"
+        if path.is_dir():
+            tar.addfile(_tarinfo(name, mtime, True))
+            continue
+        with open(path, "rb") as f:
+            digest = hashlib.sha256()
+            reader = _HashingReader(f, digest)
+            tar.addfile(_tarinfo(name, mtime, False, path.stat().st_size), reader)
+        manifest[relative] = digest.hexdigest()
+    return manifest
+
+def build_package(package_dir=PACKAGE_DIR, output=OUTPUT_FILE, mtime=None, compress_assets=True,
+                  stage=True):
+    """Build a byte-reproducible .tar.gz of the package plus a manifest beside it
+
+    The package is staged first (see stage_package) unless stage is False,
+    in which case package_dir is archived as it is.
+    Returns the manifest dict that was written.
+    """
+    if stage:
+        stage_package(package_dir, compress_assets=compress_assets)
+        package_dir = STAGING_DIR
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "wb") as raw:
+        # filename="" and mtime=0 keep the gzip header identical between builds
+        with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as gz:
+            with tarfile.open(fileobj=gz, mode="w", format=tarfile.GNU_FORMAT) as tar:
+                files = write_package_tar(tar, package_dir, mtime)
+
+    manifest = {
+        "package": os.path.basename(output),
+        "sha256": file_sha256(output),
+        "size": os.path.getsize(output),
+        "files": files,
+    }
+    with open(manifest_path_for(output), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return manifest
+
+def manifest_path_for(output):
+    """dist/foo.tar.gz -> dist/foo.manifest.json"""
+    base = output[:-len(".tar.gz")] if output.endswith(".tar.gz") else output
+    return f"{base}.manifest.json"
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the EzEdit.co deployment tarball")
+    parser.add_argument("--source", default=PACKAGE_DIR, help="directory to package")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="tarball to write")
+    parser.add_argument("--mtime", type=int, default=None,
+                        help="timestamp for every entry (default: SOURCE_DATE_EPOCH or a fixed date)")
+    parser.add_argument("--no-precompress", action="store_true",
+                        help="don't write .gz/.br siblings of text assets")
+    parser.add_argument("--staging", default=STAGING_DIR,
+                        help="where the fingerprinted, precompressed copy is prepared")
+    args = parser.parse_args()
+
+    print("📦 EzEdit.co Package Builder")
+    print("============================")
+
+    if not os.path.isdir(args.source):
+        print(f"❌ Source directory '{args.source}' not found!")
+        return False
+
+    assets, report = stage_package(args.source, args.staging, compress_assets=not args.no_precompress)
+    print(f"🔖 Fingerprinted {len(assets)} assets (map: {ASSET_MANIFEST})")
+    print_precompress_report(report)
+    manifest = build_package(args.staging, args.output, args.mtime, stage=False)
+    print(f"✅ Built {args.output}")
+    print(f"   Files:    {len(manifest['files'])}")
+    print(f"   Size:     {manifest['size'] / 1024:.1f} KB")
+    print(f"   SHA-256:  {manifest['sha256']}")
+    print(f"   Manifest: {manifest_path_for(args.output)}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co Package Store
+Content-addressed storage for deployment packages: every file is kept once,
+keyed by its SHA-256, and a package version is just a small manifest
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tarfile
+import threading
+import time
+from pathlib import Path
+
+from package_builder import ARCHIVE_ROOT, DIR_MODE, FILE_MODE, OWNER_GID, OWNER_NAME, OWNER_UID
+from package_builder import package_entries, package_mtime
+
+STORE_DIR = ".package-store"
+
+class PackageStore:
+    """Blobs under blobs/<aa>/<sha256>, package manifests under packages/<name>.json
+    and, per deploy target, the remote location of every blob it is known to hold
+    under targets/<host>.json
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.package_dir = self.root / "packages"
+        self.target_dir = self.root / "targets"
+
+    # Blobs
+
+    def blob_path(self, digest):
+        return self.blob_dir / digest[:2] / digest
+
+    def has_blob(self, digest):
+        return self.blob_path(digest).exists()
+
+    def put_stream(self, f):
+        """Store the contents of a binary file object, returning (digest, size, added)"""
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = tmp_dir / f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}"
+        digest = hashlib.sha256()
+        size = 0
+        with open(tmp_path, "wb") as out:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        digest = digest.hexdigest()
+        target = self.blob_path(digest)
+        if target.exists():
+            tmp_path.unlink()
+            return digest, size, False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+        return digest, size, True
+
+    def open_blob(self, digest):
+        return open(self.blob_path(digest), "rb")
+
+    # Packages
+
+    def package_path(self, name):
+        return self.package_dir / f"{name}.json"
+
+    def save_package(self, name, entries, source=None):
+        self.package_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "name": name,
+            "source": source,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "entries": entries,
+        }
+        with open(self.package_path(name), "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.write("\n")
+        return manifest
+
+    def load_package(self, name):
+        with open(self.package_path(name)) as f:
+            return json.load(f)
+
+    def packages(self):
+        if not self.package_dir.exists():
+            return []
+        return sorted(p.stem for p in self.package_dir.glob("*.json"))
+
+    def add_tarball(self, tarball, name=None):
+        """Import an existing .tar.gz, keeping names, modes, owners and mtimes"""
+        name = name or Path(tarball).name.split(".tar")[0]
+        entries = []
+        added = 0
+        with tarfile.open(tarball, "r:*") as tar:
+            for member in tar:
+                entry = {
+                    "path": member.name,
+                    "mode": member.mode,
+                    "mtime": int(member.mtime),
+                    "uid": member.uid,
+                    "gid": member.gid,
+                    "uname": member.uname,
+                    "gname": member.gname,
+                }
+                if member.isdir():
+                    entry["type"] = "dir"
+                elif member.issym():
+                    entry["type"] = "symlink"
+                    entry["target"] = member.linkname
+                elif member.isfile():
+                    digest, size, new = self.put_stream(tar.extractfile(member))
+                    entry.update(type="file", sha256=digest, size=size)
+                    added += size if new else 0
+                else:
+                    continue
+                entries.append(entry)
+        self.save_package(name, entries, source=os.path.basename(tarball))
+        return name, added
+
+    def add_directory(self, package_dir, name):
+        """Import a package directory the way package_builder would archive it"""
+        root = Path(package_dir)
+        mtime = package_mtime()
+        owner = {"uid": OWNER_UID, "gid": OWNER_GID, "uname": OWNER_NAME, "gname": OWNER_NAME}
+        entries = [{"path": ARCHIVE_ROOT, "type": "dir", "mode": DIR_MODE, "mtime": mtime, **owner}]
+        added = 0
+        for path in package_entries(package_dir):
+            entry = {"path": f"{ARCHIVE_ROOT}/{path.relative_to(root).as_posix()}",
+                     "mtime": mtime, **owner}
+            if path.is_dir():
+                entry.update(type="dir", mode=DIR_MODE)
+            else:
+                with open(path, "rb") as f:
+                    digest, size, new = self.put_stream(f)
+                entry.update(type="file", mode=FILE_MODE, sha256=digest, size=size)
+                added += size if new else 0
+            entries.append(entry)
+        self.save_package(name, entries, source=str(package_dir))
+        return name, added
+
+    def build_tarball(self, name, output):
+        """Recreate a package as a .tar.gz from its manifest and the blobs"""
+        manifest = self.load_package(name)
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "wb") as raw:
+            with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as gz:
+                with tarfile.open(fileobj=gz, mode="w", format=tarfile.GNU_FORMAT) as tar:
+                    for entry in manifest["entries"]:
+                        info = tarfile.TarInfo(entry["path"])
+                        info.mode = entry["mode"]
+                        info.mtime = entry["mtime"]
+                        info.uid, info.gid = entry["uid"], entry["gid"]
+                        info.uname, info.gname = entry["uname"], entry["gname"]
+                        if entry["type"] == "dir":
+                            info.type = tarfile.DIRTYPE
+                            tar.addfile(info)
+                        elif entry["type"] == "symlink":
+                            info.type = tarfile.SYMTYPE
+                            info.linkname = entry["target"]
+                            tar.addfile(info)
+                        else:
+                            info.size = entry["size"]
+                            with self.open_blob(entry["sha256"]) as f:
+                                tar.addfile(info, f)
+        return output
+
+    def stats(self):
+        """Logical bytes across all packages versus bytes actually stored"""
+        logical = 0
+        referenced = set()
+        for name in self.packages():
+            for entry in self.load_package(name)["entries"]:
+                if entry["type"] == "file":
+                    logical += entry["size"]
+                    referenced.add(entry["sha256"])
+        stored = sum(p.stat().st_size for p in self.blob_dir.glob("*/*")) if self.blob_dir.exists() else 0
+        return {"packages": len(self.packages()), "blobs": len(referenced),
+                "logical_bytes": logical, "stored_bytes": stored}
+
+    # Deploy targets
+
+    def target_path(self, host):
+        return self.target_dir / f"{host}.json"
+
+    def target_blobs(self, host):
+        """Map of blob digest -> remote path of a copy the target is known to hold"""
+        try:
+            with open(self.target_path(host)) as f:
+                return json.load(f)["blobs"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def record_target(self, host, remote_root, files):
+        """Remember that remote_root on host holds these files ({path: digest})"""
+        blobs = self.target_blobs(host)
+        for path, digest in files.items():
+            blobs[digest] = f"{remote_root}/{path}"
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.target_path(host), "w") as f:
+            json.dump({"host": host, "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "blobs": blobs}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    def forget_target_paths(self, host, prefix):
+        """Drop recorded locations under a remote directory that no longer exists"""
+        blobs = {digest: path for digest, path in self.target_blobs(host).items()
+                 if not path.startswith(prefix.rstrip("/") + "/")}
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.target_path(host), "w") as f:
+            json.dump({"host": host, "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "blobs": blobs}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed store for EzEdit.co packages")
+    parser.add_argument("--store", default=STORE_DIR, help="store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("import", help="import .tar.gz packages")
+    add.add_argument("tarballs", nargs="+")
+
+    add_dir = sub.add_parser("add-dir", help="import a package directory")
+    add_dir.add_argument("name")
+    add_dir.add_argument("directory", nargs="?", default="deployment-package/public_html")
+
+    build = sub.add_parser("build", help="rebuild a package as a .tar.gz")
+    build.add_argument("name")
+    build.add_argument("output")
+
+    sub.add_parser("list", help="list stored packages")
+    sub.add_parser("stats", help="show deduplication statistics")
+
+    args = parser.parse_args()
+    store = PackageStore(args.store)
+
+    if args.command == "import":
+        for tarball in args.tarballs:
+            name, added = store.add_tarball(tarball)
+            print(f"✅ {name}: {os.path.getsize(tarball) / 1024:.1f} KB archive, "
+                  f"{added / 1024:.1f} KB of new content")
+    elif args.command == "add-dir":
+        name, added = store.add_directory(args.directory, args.name)
+        print(f"✅ {name}: {added / 1024:.1f} KB of new content")
+    elif args.command == "build":
+        store.build_tarball(args.name, args.output)
+        print(f"✅ Rebuilt {args.name} -> {args.output} ({os.path.getsize(args.output) / 1024:.1f} KB)")
+    elif args.command == "list":
+        for name in store.packages():
+            manifest = store.load_package(name)
+            files = [e for e in manifest["entries"] if e["type"] == "file"]
+            size = sum(e["size"] for e in files)
+            print(f"📦 {name}: {len(files)} files, {size / 1024:.1f} KB")
+    elif args.command == "stats":
+        stats = store.stats()
+        ratio = stats["logical_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+        print(f"📦 Packages:     {stats['packages']}")
+        print(f"🧱 Unique blobs: {stats['blobs']}")
+        print(f"📄 Logical size: {stats['logical_bytes'] / 1024:.1f} KB")
+        print(f"💾 Stored size:  {stats['stored_bytes'] / 1024:.1f} KB ({ratio:.1f}x dedup)")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Parallel, pipelined SFTP transfers for EzEdit.co deployments
+Spreads uploads over several SFTP channels and SSH connections
+"""
+
+import hashlib
+import os
+import queue
+import shlex
+import threading
+import time
+
+# Matches paramiko's largest SFTP write request
+BLOCK_SIZE = 32768
+
+# Files above this size are split into ranges written concurrently
+PART_SIZE = 256 * 1024
+
+# Resumable uploads: hashed chunk size, and reconnects before giving up
+CHUNK_SIZE = 1024 * 1024
+RETRIES = 5
+RETRY_DELAY = 2.0
+
+class TransferStats:
+    """Thread-safe byte counter that reports throughput while a transfer runs"""
+
+    def __init__(self, total_bytes, interval=1.0, echo=True):
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.echo = echo
+        self.done_bytes = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reporter = None
+
+    def add(self, count):
+        with self._lock:
+            self.done_bytes += count
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def rate(self):
+        elapsed = self.elapsed()
+        return self.done_bytes / elapsed if elapsed > 0 else 0.0
+
+    def line(self):
+        total = f"/{self.total_bytes / 1024:.1f}" if self.total_bytes else ""
+        return (f"📶 {self.done_bytes / 1024:.1f}{total} KB "
+                f"in {self.elapsed():.2f}s ({self.rate() / 1024:.1f} KB/s)")
+
+    def start(self):
+        self.started = time.monotonic()
+        if self.echo:
+            self._reporter = threading.Thread(target=self._report, daemon=True)
+            self._reporter.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._reporter:
+            self._reporter.join()
+        if self.echo:
+            print(f"   {self.line()}")
+
+    def _report(self):
+        while not self._stop.wait(self.interval):
+            print(f"   {self.line()}")
+
+class SFTPPool:
+    """A set of SFTP channels spread over one or more SSH connections
+
+    `connect` is a zero-argument callable returning a connected
+    paramiko.SSHClient. An already-open client can be passed as `ssh` and is
+    used as the first connection (it is not closed by the pool).
+    """
+
+    def __init__(self, connect, connections=1, channels=4, ssh=None):
+        self.clients = []
+        self.sessions = []
+        self._owned = []
+        if ssh is not None:
+            self.clients.append(ssh)
+        while len(self.clients) < max(1, connections):
+            client = connect()
+            self.clients.append(client)
+            self._owned.append(client)
+        for client in self.clients:
+            for _ in range(max(1, channels)):
+                self.sessions.append(client.open_sftp())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for sftp in self.sessions:
+            sftp.close()
+        for client in self._owned:
+            client.close()
+        self.sessions = []
+        self._owned = []
+
+def _write_range(sftp, local_path, remote_path, offset, length, whole, stats,
+                 block_size=BLOCK_SIZE):
+    """Write one byte range of a local file into a remote file
+
+    Writes are pipelined: paramiko queues each request without waiting for
+    its acknowledgement, so many blocks are in flight at once and the acks
+    are collected when the file is closed. Whole files are created by the
+    write itself; ranges go into a file the caller already created.
+    """
+    with open(local_path, "rb") as src, sftp.open(remote_path, "wb" if whole else "r+b") as dst:
+        dst.set_pipelined(True)
+        src.seek(offset)
+        dst.seek(offset)
+        remaining = length
+        while remaining > 0:
+            block = src.read(min(block_size, remaining))
+            if not block:
+                break
+            dst.write(block)
+            remaining -= len(block)
+            stats.add(len(block))
+
+def _plan(pairs, part_size):
+    """Split (local, remote) pairs into (local, remote, offset, length, whole) work items
+
+    Largest items go first so the pool finishes evenly.
+    """
+    items = []
+    for local_path, remote_path in pairs:
+        size = os.path.getsize(local_path)
+        if size <= part_size:
+            items.append((local_path, remote_path, 0, size, True))
+            continue
+        for offset in range(0, size, part_size):
+            items.append((local_path, remote_path, offset, min(part_size, size - offset), False))
+    items.sort(key=lambda item: item[3], reverse=True)
+    return items
+
+def upload_files(pool, pairs, part_size=PART_SIZE, echo=True):
+    """Upload (local, remote) file pairs using every channel in the pool
+
+    Remote directories must already exist and permissions are left to the
+    caller. Small files are spread across the channels whole; large files are
+    split into ranges written concurrently. Returns the TransferStats of the run.
+    """
+    pairs = list(pairs)
+    total = sum(os.path.getsize(local_path) for local_path, _ in pairs)
+    stats = TransferStats(total, echo=echo)
+    items = _plan(pairs, part_size)
+
+    # Create (and truncate) split files up front so their ranges can land in any order
+    for remote_path in sorted({item[1] for item in items if not item[4]}):
+        with pool.sessions[0].open(remote_path, "wb"):
+            pass
+
+    work = queue.Queue()
+    for item in items:
+        work.put(item)
+
+    errors = []
+
+    def worker(sftp):
+        while not errors:
+            try:
+                item = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                _write_range(sftp, *item, stats)
+            except Exception as e:
+                errors.append(e)
+
+    stats.start()
+    threads = [threading.Thread(target=worker, args=(sftp,)) for sftp in pool.sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.stop()
+
+    if errors:
+        raise errors[0]
+    return stats
+
+def chunk_hashes(local_path, chunk_size=CHUNK_SIZE):
+    """SHA-256 of each chunk of a local file, plus the SHA-256 of the whole file"""
+    hashes = []
+    whole = hashlib.sha256()
+    with open(local_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hashes.append(hashlib.sha256(chunk).hexdigest())
+            whole.update(chunk)
+    return hashes, whole.hexdigest()
+
+def remote_chunk_hashes(ssh, remote_path, count, chunk_size=CHUNK_SIZE):
+    """SHA-256 of the first `count` chunks of a remote file, hashed on the server
+
+    Chunks past the end of the file come back as the hash of whatever is
+    there (possibly nothing), so they simply don't match.
+    """
+    path = shlex.quote(remote_path)
+    script = (f"[ -f {path} ] || exit 0\n"
+              f"i=0; while [ $i -lt {count} ]; do "
+              f"dd if={path} bs={chunk_size} skip=$i count=1 2>/dev/null | sha256sum | cut -d' ' -f1; "
+              f"i=$((i+1)); done\n")
+    stdin, stdout, stderr = ssh.exec_command("sh -s")
+    stdin.write(script)
+    stdin.channel.shutdown_write()
+    hashes = [line.strip() for line in stdout.read().decode().splitlines() if line.strip()]
+    stdout.channel.recv_exit_status()
+    return hashes + [None] * (count - len(hashes))
+
+def remote_sha256(ssh, remote_path):
+    stdin, stdout, stderr = ssh.exec_command(f"sha256sum {shlex.quote(remote_path)}")
+    output = stdout.read().decode().split()
+    stdout.channel.recv_exit_status()
+    return output[0] if output else None
+
+def _write_chunks(pool, local_path, remote_path, chunks, chunk_size, size, stats):
+    """Write the given chunk indexes into an existing remote file over every channel"""
+    work = queue.Queue()
+    for index in chunks:
+        offset = index * chunk_size
+        work.put((local_path, remote_path, offset, min(chunk_size, size - offset), False))
+    errors = []
+
+    def worker(sftp):
+        while not errors:
+            try:
+                item = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                _write_range(sftp, *item, stats)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(sftp,)) for sftp in pool.sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def upload_resumable(connect, local_path, remote_path, connections=1, channels=4,
+                     chunk_size=CHUNK_SIZE, retries=RETRIES, ssh=None, echo=True):
+    """Upload one file in hashed chunks, resuming from what the server already holds
+
+    The data goes to `remote_path`.part. Before every attempt the server
+    hashes the chunks it has and only missing or damaged chunks are sent;
+    after the write, each chunk and then the whole file is checked on the
+    server, and only then is the part file renamed to `remote_path`. A
+    dropped connection reconnects (up to `retries` times) and carries on
+    from the last confirmed chunk. Returns the TransferStats of the bytes
+    actually sent.
+    """
+    import paramiko
+
+    size = os.path.getsize(local_path)
+    local, whole = chunk_hashes(local_path, chunk_size)
+    partial = f"{remote_path}.part"
+    stats = TransferStats(0, echo=echo).start()
+    attempt = 0
+    try:
+        while True:
+            try:
+                with SFTPPool(connect, connections, channels, ssh=ssh if attempt == 0 else None) as pool:
+                    client = pool.clients[0]
+                    sftp = pool.sessions[0]
+                    # A longer part file (from another package) would never hash equal at the end
+                    try:
+                        if sftp.stat(partial).st_size > size:
+                            sftp.truncate(partial, size)
+                    except FileNotFoundError:
+                        with sftp.open(partial, "wb"):
+                            pass
+                    for check in range(retries + 1):
+                        remote = remote_chunk_hashes(client, partial, len(local), chunk_size)
+                        missing = [i for i, digest in enumerate(local) if remote[i] != digest]
+                        if not missing:
+                            break
+                        if check == 0 and len(missing) < len(local):
+                            print(f"♻️ Resuming: {len(local) - len(missing)}/{len(local)} chunks already on the server")
+                        elif check > 0:
+                            print(f"⚠️ {len(missing)} chunk(s) failed verification, resending them")
+                        _write_chunks(pool, local_path, partial, missing, chunk_size, size, stats)
+                    else:
+                        raise IOError(f"chunks of {remote_path} still differ after {retries} resends")
+                    if remote_sha256(client, partial) != whole:
+                        sftp.remove(partial)
+                        raise IOError(f"{remote_path} failed its end-to-end SHA-256 check")
+                    sftp.posix_rename(partial, remote_path)
+                    return stats
+            except (OSError, EOFError, paramiko.SSHException) as e:
+                attempt += 1
+                if attempt > retries:
+                    raise
+                delay = RETRY_DELAY * attempt
+                print(f"⚠️ Upload interrupted ({e}); retrying from the last confirmed chunk in {delay:.0f}s "
+                      f"({attempt}/{retries})")
+                time.sleep(delay)
+    finally:
+        stats.stop()
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+EzEdit.co SSH Connection Pool
+One authenticated SSH transport per host, shared by everything in a run, and
+optionally kept alive between runs behind a local control socket
+"""
+
+import argparse
+import getpass
+import hashlib
+import json
+import os
+import select
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Seconds between keepalive packets on idle transports
+KEEPALIVE = 30
+
+# Control sockets: where they live and how long an idle master stays up. Like
+# OpenSSH's ControlPath this prefers the per-user runtime directory; a shared
+# /tmp fallback is only used if it is ours and private (check_control_dir)
+CONTROL_DIR = os.environ.get(
+    "EZEDIT_CONTROL_DIR",
+    os.path.join(os.environ["XDG_RUNTIME_DIR"], "ezedit-ssh") if os.environ.get("XDG_RUNTIME_DIR")
+    else os.path.join(tempfile.gettempdir(), f"ezedit-ssh-{getpass.getuser()}"))
+CONTROL_PERSIST = 600
+
+# Frames from the master for an exec: 1 byte kind, 4 byte length, payload
+_FRAME = struct.Struct("!cI")
+
+def open_client(hostname, port, username, password, keepalive=KEEPALIVE, timeout=30):
+    """A new authenticated paramiko client with keepalive enabled"""
+    import paramiko
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(hostname, port=port, username=username, password=password, timeout=timeout)
+    ssh.get_transport().set_keepalive(keepalive)
+    return ssh
+
+def control_path(hostname, port, username):
+    """Socket path for a host; hashed so it stays under the AF_UNIX length limit"""
+    key = hashlib.sha256(f"{username}@{hostname}:{port}".encode()).hexdigest()[:16]
+    return os.path.join(CONTROL_DIR, f"{key}.sock")
+
+def check_control_dir(directory=CONTROL_DIR, create=False):
+    """Refuse a control directory another user owns or can reach
+
+    Sockets in it carry every command and SFTP session, so a directory
+    someone else created first (with a socket planted at the predictable
+    path) must not be trusted.
+    """
+    if create:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"control directory {directory} must be a directory owned by "
+                              f"this user with mode 0700")
+
+class _SharedClient:
+    """A pooled client: callers use it like an SSHClient, but close() leaves it open"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def close(self):
+        pass
+
+class ConnectionPool:
+    """Hands out one shared connection per (host, port, user)
+
+    Channels (commands, SFTP sessions) are multiplexed over that connection.
+    With control=True the connection is held by a background master process
+    reached through a Unix socket, so the next run skips key exchange and
+    authentication too; the master exits after `persist` idle seconds.
+    """
+
+    def __init__(self, keepalive=KEEPALIVE, control=False, persist=CONTROL_PERSIST):
+        self.keepalive = keepalive
+        self.control = control
+        self.persist = persist
+        self._clients = {}
+        self._connecting = {}
+        self._lock = threading.Lock()
+
+    def get(self, hostname, port, username, password, timeout=30):
+        key = (hostname, port, username)
+        # The pool lock only guards the maps; connecting holds the host's own
+        # lock, so hosts connect in parallel and a dead one stalls only itself
+        with self._lock:
+            host_lock = self._connecting.setdefault(key, threading.Lock())
+        with host_lock:
+            with self._lock:
+                client = self._clients.get(key)
+            if client is not None and _is_active(client):
+                return client
+            if self.control:
+                client = self._control_client(hostname, port, username, password, timeout)
+            else:
+                client = _SharedClient(open_client(hostname, port, username, password,
+                                                   self.keepalive, timeout))
+            with self._lock:
+                self._clients[key] = client
+            return client
+
+    def _control_client(self, hostname, port, username, password, timeout):
+        path = control_path(hostname, port, username)
+        check_control_dir(os.path.dirname(path), create=True)
+        client = ControlClient(path)
+        if client.is_active():
+            return client
+        start_master(hostname, port, username, password, path, self.persist, self.keepalive)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if client.is_active():
+                return client
+            time.sleep(0.05)
+        raise ConnectionError(f"SSH control master for {hostname} did not start")
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                if isinstance(client, _SharedClient):
+                    client._client.close()
+            self._clients.clear()
+
+def _is_active(client):
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+_pool = None
+
+def get_pool():
+    """The process-wide pool; EZEDIT_SSH_CONTROL=1 turns the control socket on"""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(control=os.environ.get("EZEDIT_SSH_CONTROL") == "1")
+    return _pool
+
+# Control socket client
+
+class _RelaySocket(socket.socket):
+    """Unix socket with the few Channel methods paramiko's SFTP client calls"""
+
+    def get_name(self):
+        return "control"
+
+    def recv_ready(self):
+        return bool(select.select([self], [], [], 0)[0])
+
+class _ControlStream:
+    """stdout/stderr of a relayed command, filled by the frame reader"""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._buffer = b""
+        self._eof = False
+        self._cond = threading.Condition()
+
+    def _feed(self, data):
+        with self._cond:
+            self._buffer += data
+            self._cond.notify_all()
+
+    def _close(self):
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+
+    def read(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._eof)
+            data, self._buffer = self._buffer, b""
+            return data
+
+    def readline(self):
+        with self._cond:
+            self._cond.wait_for(lambda: b"\n" in self._buffer or self._eof)
+            end = self._buffer.find(b"\n") + 1 or len(self._buffer)
+            line, self._buffer = self._buffer[:end], self._buffer[end:]
+            return line.decode("utf-8", "replace")
+
+    def __iter__(self):
+        return iter(self.readline, "")
+
+class _ControlStdin:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def write(self, data):
+        self.channel.sock.sendall(data.encode() if isinstance(data, str) else data)
+
+    def flush(self):
+        pass
+
+class _ControlExec:
+    """The `channel` of a relayed command: stdin shutdown and exit status"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.exit_status = None
+        self._done = threading.Event()
+        self.stdin = _ControlStdin(self)
+        self.stdout = _ControlStream(self)
+        self.stderr = _ControlStream(self)
+        threading.Thread(target=self._read_frames, daemon=True).start()
+
+    def _read_frames(self):
+        try:
+            while True:
+                header = _recv_exact(self.sock, _FRAME.size)
+                if header is None:
+                    break
+                kind, length = _FRAME.unpack(header)
+                payload = _recv_exact(self.sock, length) if length else b""
+                if kind == b"o":
+                    self.stdout._feed(payload)
+                elif kind == b"e":
+                    self.stderr._feed(payload)
+                elif kind == b"x":
+                    self.exit_status = struct.unpack("!i", payload)[0]
+                    break
+        except OSError:
+            pass
+        finally:
+            if self.exit_status is None:
+                self.exit_status = -1
+            self.stdout._close()
+            self.stderr._close()
+            self._done.set()
+            self.sock.close()
+
+    def shutdown_write(self):
+        try:
+            self.sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    def recv_exit_status(self):
+        self._done.wait()
+        return self.exit_status
+
+class ControlClient:
+    """Talks to a control master; offers the SSHClient calls the tools use"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _open(self, request):
+        sock = _RelaySocket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        reply = _recv_line(sock)
+        if reply != "ok":
+            sock.close()
+            raise ConnectionError(f"control master: {reply or 'no reply'}")
+        return sock
+
+    def exec_command(self, command):
+        channel = _ControlExec(self._open({"type": "exec", "command": command}))
+        return channel.stdin, channel.stdout, channel.stderr
+
+    def open_sftp(self):
+        import paramiko
+        return paramiko.SFTPClient(self._open({"type": "sftp"}))
+
+    def get_transport(self):
+        return self
+
+    def is_active(self):
+        try:
+            self._open({"type": "ping"}).close()
+            return True
+        except OSError:
+            return False
+
+    def stop(self):
+        try:
+            self._open({"type": "exit"}).close()
+        except OSError:
+            pass
+
+    def close(self):
+        pass
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def _recv_line(sock):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(1)
+        if not chunk:
+            break
+        data += chunk
+    return data.decode().strip()
+
+# Control master
+
+def start_master(hostname, port, username, password, path, persist=CONTROL_PERSIST, keepalive=KEEPALIVE):
+    """Start a detached master for a host; the password goes over its stdin"""
+    check_control_dir(os.path.dirname(path), create=True)
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "master", "--host", hostname, "--port", str(port),
+         "--user", username, "--control-path", path, "--persist", str(persist),
+         "--keepalive", str(keepalive)],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True)
+    process.stdin.write(password.encode() + b"\n")
+    process.stdin.close()
+    return process
+
+class _Master:
+    def __init__(self, client, path, persist):
+        self.client = client
+        self.path = path
+        self.persist = persist
+        self.active = 0
+        self.last_used = time.monotonic()
+        self.stopping = False
+        self.lock = threading.Lock()
+
+    def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        server.listen(64)
+        server.settimeout(1.0)
+        try:
+            while not self.stopping and _is_active(self.client):
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    with self.lock:
+                        if not self.active and time.monotonic() - self.last_used > self.persist:
+                            break
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            server.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.client.close()
+
+    def _handle(self, conn):
+        with self.lock:
+            self.active += 1
+        try:
+            request = json.loads(_recv_line(conn) or "{}")
+            kind = request.get("type")
+            if kind == "ping":
+                conn.sendall(b"ok\n")
+            elif kind == "exit":
+                self.stopping = True
+                conn.sendall(b"ok\n")
+            elif kind == "sftp":
+                channel = self.client.get_transport().open_session()
+                channel.invoke_subsystem("sftp")
+                conn.sendall(b"ok\n")
+                self._relay_sftp(conn, channel)
+            elif kind == "exec":
+                channel = self.client.get_transport().open_session()
+                channel.exec_command(request["command"])
+                conn.sendall(b"ok\n")
+                self._relay_exec(conn, channel)
+            else:
+                conn.sendall(b"error unknown request\n")
+        except Exception as e:
+            try:
+                conn.sendall(f"error {e}\n".encode())
+            except OSError:
+                pass
+        finally:
+            conn.close()
+            with self.lock:
+                self.active -= 1
+                self.last_used = time.monotonic()
+
+    def _relay_sftp(self, conn, channel):
+        def upstream():
+            try:
+                for data in iter(lambda: conn.recv(65536), b""):
+                    channel.sendall(data)
+            except OSError:
+                pass
+            finally:
+                channel.close()
+
+        thread = threading.Thread(target=upstream, daemon=True)
+        thread.start()
+        try:
+            for data in iter(lambda: channel.recv(65536), b""):
+                conn.sendall(data)
+        except OSError:
+            pass
+        finally:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            thread.join()
+
+    def _relay_exec(self, conn, channel):
+        send_lock = threading.Lock()
+
+        def send(kind, payload):
+            with send_lock:
+                conn.sendall(_FRAME.pack(kind, len(payload)) + payload)
+
+        def stdin():
+            try:
+                for data in iter(lambda: conn.recv(65536), b""):
+                    channel.sendall(data)
+            except OSError:
+                pass
+            finally:
+                channel.shutdown_write()
+
+        def stderr():
+            for data in iter(lambda: channel.recv_stderr(65536), b""):
+                send(b"e", data)
+
+        threading.Thread(target=stdin, daemon=True).start()
+        errors = threading.Thread(target=stderr, daemon=True)
+        errors.start()
+        for data in iter(lambda: channel.recv(65536), b""):
+            send(b"o", data)
+        errors.join()
+        send(b"x", struct.pack("!i", channel.recv_exit_status()))
+        channel.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared SSH connections for EzEdit.co tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    master = sub.add_parser("master", help="hold a connection behind a control socket (password on stdin)")
+    master.add_argument("--host", required=True)
+    master.add_argument("--port", type=int, default=22)
+    master.add_argument("--user", required=True)
+    master.add_argument("--control-path", required=True)
+    master.add_argument("--persist", type=float, default=CONTROL_PERSIST)
+    master.add_argument("--keepalive", type=int, default=KEEPALIVE)
+
+    sub.add_parser("status", help="list running control masters")
+    stop = sub.add_parser("stop", help="stop running control masters")
+    stop.add_argument("sockets", nargs="*", help="control sockets (default: all)")
+
+    args = parser.parse_args()
+
+    if args.command == "master":
+        password = sys.stdin.readline().rstrip("\n")
+        client = open_client(args.host, args.port, args.user, password, args.keepalive)
+        _Master(client, args.control_path, args.persist).serve()
+        return True
+
+    paths = []
+    if os.path.isdir(CONTROL_DIR):
+        check_control_dir(CONTROL_DIR)
+        paths = sorted(os.path.join(CONTROL_DIR, name) for name in os.listdir(CONTROL_DIR)
+                       if name.endswith(".sock"))
+    if args.command == "stop":
+        paths = args.sockets or paths
+        for path in paths:
+            ControlClient(path).stop()
+            print(f"🛑 Stopped {path}")
+        return True
+
+    if not paths:
+        print("🔌 No control masters running")
+    for path in paths:
+        state = "✅ active" if ControlClient(path).is_active() else "⚠️ stale"
+        print(f"{state} {path}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
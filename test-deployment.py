@@ -1,23 +1,63 @@
 #!/usr/bin/env python3
-import requests
+import argparse
+import http.client
 import sys
+import time
+from urllib.parse import urlsplit
 
-DROPLET_IP = "159.65.224.175"
+from ezedit_config import BASE_URL
+
+# Uses http.client rather than requests so the smoke test starts quickly; one
+# keep-alive connection serves every page
+_connection = None
+
+# Per-page timings and sizes, saved to the benchmark history after the run.
+# Each page is timed SAMPLES times, enough for bench_history's latency test
+METRICS = {}
+SAMPLES = 5
+
+def get(path, timeout=10):
+    """GET a page over the shared connection, returning (status, body)"""
+    global _connection
+    url = urlsplit(BASE_URL)
+    for attempt in range(2):
+        if _connection is None:
+            connection_class = (http.client.HTTPSConnection if url.scheme == "https"
+                                else http.client.HTTPConnection)
+            _connection = connection_class(url.netloc, timeout=timeout)
+        try:
+            _connection.request("GET", f"{url.path.rstrip('/')}{path}")
+            response = _connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, ConnectionError):
+            # The server may have closed the kept-alive connection; retry once on a new one
+            _connection.close()
+            _connection = None
+            if attempt:
+                raise
 
 def test_page(path, expected_content):
     try:
-        response = requests.get(f"http://{DROPLET_IP}{path}", timeout=10)
-        if response.status_code == 200 and expected_content in response.text:
+        start = time.monotonic()
+        status, body = get(path)
+        samples = [time.monotonic() - start]
+        for _ in range(SAMPLES - 1):
+            start = time.monotonic()
+            get(path)
+            samples.append(time.monotonic() - start)
+        METRICS[f"latency:{path}"] = samples
+        METRICS[f"size:{path}"] = len(body)
+        if status == 200 and expected_content in body.decode("utf-8", "replace"):
             print(f"✅ {path}: OK")
             return True
         else:
-            print(f"❌ {path}: HTTP {response.status_code}")
+            print(f"❌ {path}: HTTP {status}")
             return False
     except Exception as e:
         print(f"❌ {path}: Error - {e}")
         return False
 
-def main():
+def main(record=True, gate=None):
     print("🧪 Testing EzEdit.co deployment...")
     
     tests = [
@@ -34,13 +74,33 @@ def main():
     
     print(f"\n📊 Test Results: {passed}/{len(tests)} passed")
     
-    if passed == len(tests):
+    gate_ok = True
+    if record:
+        from bench_history import History, gate_run
+        history = History()
+        run = history.record("smoke", METRICS, target=BASE_URL,
+                             details={"passed": passed, "total": len(tests)})
+        print(f"💾 Recorded run {run['id']}")
+        if gate:
+            gate_ok = gate_run(history, run, gate)
+    
+    if passed == len(tests) and gate_ok:
         print("🎉 All tests passed! Deployment successful.")
         return True
+    elif passed == len(tests):
+        print("⚠️  All tests passed, but the run regressed against the baseline.")
+        return False
     else:
         print("⚠️  Some tests failed. Check deployment.")
         return False
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Smoke-test the EzEdit.co deployment")
+    parser.add_argument("--no-history", action="store_true",
+                        help="don't record this run in the benchmark history")
+    parser.add_argument("--gate", nargs="?", const="previous", default=None, metavar="BASELINE",
+                        help="fail if this run regresses against a baseline run/tag (default: previous)")
+    args = parser.parse_args()
+    
+    success = main(record=not args.no_history, gate=args.gate)
     sys.exit(0 if success else 1)
@@ -0,0 +1,47 @@
+from bench_history import POOLED_LATENCY, History, compare_runs, mann_whitney_greater
+
+def _run(metrics):
+    return {"id": "run", "metrics": metrics}
+
+def test_runs_in_the_same_second_get_distinct_ids(tmp_path):
+    history = History(tmp_path)
+    first = history.record("validate", {"latency:/": [0.1]}, package_dir=str(tmp_path / "none"))
+    second = history.record("validate", {"latency:/": [0.2]}, package_dir=str(tmp_path / "none"))
+    assert first["id"] != second["id"]
+
+def test_previous_is_the_run_before(tmp_path):
+    history = History(tmp_path)
+    first = history.record("validate", {"latency:/": [0.1]}, package_dir=str(tmp_path / "none"))
+    second = history.record("validate", {"latency:/": [0.2]}, package_dir=str(tmp_path / "none"))
+    assert history.resolve("previous", "validate", before=second) == first
+    assert history.resolve("previous", "validate", before=first) is None
+
+def test_mann_whitney_separates_shifted_samples():
+    baseline = [0.10, 0.11, 0.12, 0.10, 0.11, 0.12]
+    assert mann_whitney_greater(baseline, [v + 0.05 for v in baseline]) < 0.01
+    assert mann_whitney_greater(baseline, [v - 0.05 for v in baseline]) > 0.99
+    assert mann_whitney_greater([0.1] * 5, [0.1] * 5) == 1.0
+
+def test_latency_regression_needs_size_and_significance():
+    baseline = _run({"latency:/": [0.10, 0.11, 0.12, 0.10, 0.11]})
+    slower = _run({"latency:/": [0.20, 0.21, 0.22, 0.20, 0.21]})
+    row, = compare_runs(baseline, slower)
+    assert row["regression"] and row["p_value"] < 0.05
+    noisy = _run({"latency:/": [0.09, 0.13, 0.10, 0.12, 0.11]})
+    row, = compare_runs(baseline, noisy)
+    assert not row["regression"]
+
+def test_size_and_error_rate_thresholds():
+    rows = {row["metric"]: row for row in compare_runs(
+        _run({"size:/": 1000, "error_rate:/": 0.0}),
+        _run({"size:/": 1100, "error_rate:/": 0.05}))}
+    assert rows["size:/"]["regression"]
+    assert rows["error_rate:/"]["regression"]
+
+def test_single_sample_latencies_are_pooled():
+    pages = [f"latency:/page{i}.php" for i in range(6)]
+    baseline = _run({name: [0.10 + i / 1000] for i, name in enumerate(pages)})
+    slower = _run({name: [0.20 + i / 1000] for i, name in enumerate(pages)})
+    rows = {row["metric"]: row for row in compare_runs(baseline, slower)}
+    assert not rows[pages[0]]["regression"]
+    assert rows[POOLED_LATENCY]["regression"]
@@ -0,0 +1,71 @@
+from deploy import RELEASES_DIR, diff_manifests, pruned_releases, record_deploy, run_remote_script
+from package_store import PackageStore
+
+def test_delta_uploads_changes_and_deletes_only_owned_files():
+    local = {"index.php": "new", "css/main.css": "same", "docs.php": "added"}
+    current = {"index.php": "old", "css/main.css": "same", "old.php": "x", "public/.env": "secret"}
+    owned = {"index.php", "css/main.css", "old.php", "gone.php"}
+    upload, delete = diff_manifests(local, current, owned)
+    assert upload == ["docs.php", "index.php"]
+    # public/.env is not ours and gone.php is not on the server
+    assert delete == ["old.php"]
+
+def test_pruned_releases_reads_the_prune_output():
+    results = [{"step": "switch", "status": 0, "seconds": 0.0, "output": []},
+               {"step": "prune", "status": 0, "seconds": 0.0,
+                "output": ["Pruned release 20250724_000000", "Pruned release 20250725_000000"]}]
+    assert pruned_releases(results) == ["20250724_000000", "20250725_000000"]
+    assert pruned_releases([{"step": "rollback", "status": 0, "seconds": 0.0}]) == []
+
+def test_pruned_releases_are_forgotten(tmp_path):
+    store = PackageStore(tmp_path / "store")
+    package = tmp_path / "package"
+    package.mkdir()
+    old, new = f"{RELEASES_DIR}/20250724_000000", f"{RELEASES_DIR}/20250725_000000"
+    store.record_target("host", old, {"gone.css": "a" * 64})
+    results = [{"step": "prune", "status": 0, "seconds": 0.0,
+                "output": ["Pruned release 20250724_000000"]}]
+    record_deploy(store, "host", str(package), new, {"index.php": "b" * 64}, pruned_releases(results))
+    assert store.target_blobs("host") == {"b" * 64: f"{new}/index.php"}
+
+class _LocalShell:
+    """Just enough of an SSHClient to run a remote script with local bash"""
+
+    def exec_command(self, command):
+        import io
+        import subprocess
+
+        class _Channel:
+            def __init__(self, process):
+                self.process = process
+
+            def shutdown_write(self):
+                self.process.stdin.close()
+
+            def recv_exit_status(self):
+                return self.process.wait()
+
+        class _Stdin:
+            def __init__(self, process):
+                self.channel = _Channel(process)
+                self.process = process
+
+            def write(self, data):
+                self.process.stdin.write(data)
+
+        process = subprocess.Popen(["bash", "-s"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        stdin = _Stdin(process)
+
+        class _Stdout:
+            channel = stdin.channel
+
+            def __iter__(self):
+                return iter(process.stdout)
+
+        return stdin, _Stdout(), io.StringIO()
+
+def test_steps_close_when_output_lacks_a_newline():
+    steps = ["printf 'no newline'", "printf 'second'; false"]
+    results = run_remote_script(_LocalShell(), steps, echo=False)
+    assert [(r["step"], r["status"], r["output"]) for r in results] == [
+        (steps[0], 0, ["no newline"]), (steps[1], 1, ["second"])]
@@ -0,0 +1,28 @@
+from deploy import (package_verify_step, release_empty_steps, release_shared_steps,
+                    release_switch_steps)
+from deploy_timing import DeployTimer, step, step_phase
+
+RELEASE = "/var/www/ezedit/releases/20250724_000000"
+
+def test_verify_step_is_timed():
+    assert step_phase(package_verify_step("0" * 64, "/tmp/ezedit-deployment.tar.gz")) == "verify"
+
+def test_untagged_steps_are_not_timed():
+    assert step_phase("echo 'Extracting deployment package...'") is None
+    assert step_phase("rm -f /tmp/anything") is None
+
+def test_release_steps_carry_their_phase():
+    assert {step_phase(s) for s in release_empty_steps(RELEASE)} == {"prepare"}
+    assert {step_phase(s) for s in release_shared_steps(RELEASE)} == {"shared"}
+    phases = [step_phase(s) for s in release_switch_steps(RELEASE, prune=False)]
+    assert phases == ["switch", "switch", "switch", "manifest", "reload"]
+
+def test_remote_steps_are_grouped_by_tag():
+    timer = DeployTimer("full", "host")
+    timer.add_remote_steps("remote", [
+        {"step": "echo 'Switching...'", "status": 0, "seconds": 0.1},
+        {"step": step("manifest", "mv -f /tmp/x.manifest.json /r.manifest.json"), "status": 0, "seconds": 0.2},
+        {"step": step("switch", "mv -T /current.next /current"), "status": 0, "seconds": 0.3},
+    ])
+    assert {phase: round(seconds, 3) for phase, (seconds, _) in timer.totals(steps=True).items()} == {
+        "manifest": 0.2, "switch": 0.3}
@@ -0,0 +1,45 @@
+from drift import find_drift, hash_tree
+
+class _LocalRemote:
+    """RemoteTree stand-in answering from a local directory"""
+
+    def __init__(self, root, ignore=()):
+        self.root, self.tree = hash_tree(root, ignore)
+
+    def children(self, directories):
+        return {directory: self.tree.get(directory, {}) for directory in directories}
+
+def _write(root, files):
+    for path, content in files.items():
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+
+def test_shared_paths_are_not_drift(tmp_path):
+    _write(tmp_path / "package", {"index.php": "home", "public/health.php": "ok"})
+    _write(tmp_path / "server", {"index.php": "home", "public/health.php": "ok", "public/.env": "KEY=1"})
+    local_root, local_tree = hash_tree(tmp_path / "package", {"public/.env"})
+    remote = _LocalRemote(tmp_path / "server", {"public/.env"})
+    assert remote.root == local_root
+    assert find_drift(local_root, local_tree, remote) == []
+    remote = _LocalRemote(tmp_path / "server")
+    assert find_drift(local_root, local_tree, remote) == [("extra", "public/.env")]
+
+def test_changes_are_found_level_by_level(tmp_path):
+    _write(tmp_path / "package", {"index.php": "home", "css/main.css": "new", "auth/login.php": "in"})
+    _write(tmp_path / "server", {"index.php": "home", "css/main.css": "old", "old/page.php": "x"})
+    local_root, local_tree = hash_tree(tmp_path / "package")
+    remote = _LocalRemote(tmp_path / "server")
+    assert sorted(find_drift(local_root, local_tree, remote)) == [
+        ("extra", "old/"), ("missing", "auth/"), ("modified", "css/main.css")]
+
+def test_identical_trees_have_no_drift(tmp_path):
+    _write(tmp_path / "package", {"index.php": "home", "css/main.css": "body"})
+    _write(tmp_path / "server", {"index.php": "home", "css/main.css": "body"})
+    local_root, local_tree = hash_tree(tmp_path / "package")
+    assert find_drift(local_root, local_tree, _LocalRemote(tmp_path / "server")) == []
+
+def test_missing_remote_root_is_reported():
+    class _Empty:
+        root = None
+    assert find_drift("abc", {}, _Empty()) == [("missing", "/")]
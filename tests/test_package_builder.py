@@ -0,0 +1,33 @@
+from package_builder import FINGERPRINT_PATTERN, _rewrite_references, fingerprint_assets, fingerprint_name
+
+ASSETS = {"css/main.css": "css/main.0123456789.css", "js/app.js": "js/app.abcdef0123.js"}
+
+def test_fingerprint_name_keeps_directory_and_extension():
+    name = fingerprint_name("css/main.css", "0123456789abcdef")
+    assert name == "css/main.0123456789.css"
+    assert FINGERPRINT_PATTERN.search(name)
+
+def test_references_are_rewritten_relative_and_absolute():
+    text = '<link href="css/main.css"><script src="/js/app.js"></script>'
+    assert _rewrite_references(text, "index.php", ASSETS) == (
+        '<link href="css/main.0123456789.css"><script src="/js/app.abcdef0123.js"></script>')
+    assert _rewrite_references('<link href="../css/main.css">', "auth/login.php", ASSETS) == (
+        '<link href="../css/main.0123456789.css">')
+
+def test_external_dynamic_and_unknown_references_are_kept():
+    for text in ['<script src="https://cdn.example.com/js/app.js">',
+                 '<link href="css/<?php echo $theme ?>.css">',
+                 '<link href="css/other.css">']:
+        assert _rewrite_references(text, "index.php", ASSETS) == text
+
+def test_fingerprint_assets_copies_and_rewrites(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "main.css").write_text("body { color: red }")
+    (tmp_path / "index.php").write_text('<link href="css/main.css">')
+    assets = fingerprint_assets(tmp_path)
+    fingerprinted = assets["css/main.css"]
+    assert (tmp_path / fingerprinted).read_text() == "body { color: red }"
+    assert (tmp_path / "css" / "main.css").exists()
+    assert (tmp_path / "index.php").read_text() == f'<link href="{fingerprinted}">'
+    # A second pass leaves the fingerprinted copies alone
+    assert fingerprint_assets(tmp_path) == assets
@@ -0,0 +1,37 @@
+import os
+import threading
+import time
+
+import pytest
+
+import ssh_pool
+from ssh_pool import ConnectionPool, check_control_dir
+
+class _Client:
+    def get_transport(self):
+        return self
+
+    def is_active(self):
+        return True
+
+def test_hosts_connect_in_parallel(monkeypatch):
+    def slow_connect(*args):
+        time.sleep(0.3)
+        return _Client()
+
+    monkeypatch.setattr(ssh_pool, "open_client", slow_connect)
+    pool = ConnectionPool()
+    threads = [threading.Thread(target=pool.get, args=(f"host{i}", 22, "root", "pw")) for i in range(4)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - started < 0.9
+
+def test_control_dir_must_be_private(tmp_path):
+    directory = tmp_path / "control"
+    check_control_dir(str(directory), create=True)
+    os.chmod(directory, 0o755)
+    with pytest.raises(PermissionError):
+        check_control_dir(str(directory))
@@ -7,7 +7,8 @@ import requests
 import os
 import base64
 
-DROPLET_IP = "159.65.224.175"
+from ezedit_config import DROPLET_IP
+from http_upload import RECEIVER_NAME, TOKEN_FILE, write_receiver
 
 def create_simple_uploader():
     """Create a simple PHP file uploader"""
@@ -41,6 +42,15 @@ if ($_POST && isset($_FILES['file'])) {
     
     print("✅ Created simple-uploader.php")
 
+def create_batch_uploader():
+    """Create the batch uploader that http_upload.py pushes many files through"""
+    
+    write_receiver(RECEIVER_NAME)
+    
+    print(f"✅ Created {RECEIVER_NAME}")
+    print(f"   Install it next to the site and store the token hash in {TOKEN_FILE}, then run:")
+    print("   EZEDIT_UPLOAD_TOKEN=... ezedit push")
+
 def test_current_status():
     """Test what's currently working on the server"""
     
@@ -130,10 +140,12 @@ def main():
     
     # Create helper files
     create_simple_uploader()
+    create_batch_uploader()
     create_browser_instructions()
     
     print("\n📦 Created deployment files:")
     print("- simple-uploader.php")
+    print(f"- {RECEIVER_NAME}")
     print("- browser-deployment.txt")
     print("- deploy-missing.php")
     print("- editor-for-upload.php")
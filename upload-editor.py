@@ -7,7 +7,8 @@ import requests
 import os
 from pathlib import Path
 
-DROPLET_IP = "159.65.224.175"
+from ezedit_config import DROPLET_IP
+from http_upload import RECEIVER_NAME, TOKEN, UPLOAD_URL, upload_files
 
 def upload_editor_file():
     """Upload the editor.php file"""
@@ -19,6 +20,15 @@ def upload_editor_file():
         print(f"❌ Editor file not found at {editor_file_path}")
         return False
     
+    # With the batch uploader installed the file goes up directly, hash-checked
+    if TOKEN:
+        print(f"📤 Uploading editor.php through {RECEIVER_NAME}...")
+        confirmed, failed, _ = upload_files([("editor.php", editor_file_path)], UPLOAD_URL, TOKEN)
+        if confirmed:
+            print(f"✅ Uploaded editor.php (SHA-256 {confirmed['editor.php'][:12]}... confirmed)")
+            return True
+        print(f"⚠️ Upload failed ({failed.get('editor.php')}), falling back to manual steps")
+    
     print("📖 Reading editor.php file...")
     with open(editor_file_path, 'r', encoding='utf-8') as f:
         content = f.read()
@@ -10,9 +10,10 @@ import json
 import time
 from pathlib import Path
 
+from ezedit_config import DROPLET_IP
+
 # Droplet information
 DROPLET_ID = "509389318"
-DROPLET_IP = "159.65.224.175"
 
 def check_current_deployment():
     """Check what's currently deployed on the server"""
@@ -4,19 +4,268 @@ Comprehensive deployment validation for EzEdit.co
 Tests all functionality after deployment
 """
 
+import argparse
+import codecs
+import hashlib
+import math
+import os
+import random
 import requests
+import threading
 import time
 import json
-from urllib.parse import urljoin
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin, urlparse
 
-DROPLET_IP = "159.65.224.175"
-BASE_URL = f"http://{DROPLET_IP}"
+from bench_history import History, gate_run
+from ezedit_config import BASE_URL
+from package_builder import (FINGERPRINT_LENGTH, FINGERPRINT_PATTERN, PACKAGE_DIR, _brotli, file_sha256,
+                             load_asset_manifest)
+
+# Maximum number of requests in flight at once
+CONCURRENCY = 8
+
+PERFORMANCE_PAGES = [
+    ("/", "Homepage"),
+    ("/auth/login.php", "Login"),
+    ("/dashboard.php", "Dashboard"),
+    ("/editor.php", "Editor"),
+]
+
+# Benchmark defaults: requests per endpoint and requests in flight per endpoint
+BENCH_REQUESTS = 100
+BENCH_CONCURRENCY = 10
+
+# Mock credentials accepted by the demo login
+LOGIN_DATA = {
+    'email': 'test@example.com',
+    'password': 'password123'
+}
+
+# Journey load test: the login and navigation flow, walked by virtual users
+# that start JOURNEY_RAMP_UP seconds apart in total and pause a random 0.5x to
+# 1.5x JOURNEY_THINK_TIME between steps, like a person reading the page
+JOURNEY_STEPS = [
+    ("home", "GET", "/"),
+    ("login page", "GET", "/auth/login.php"),
+    ("login", "POST", "/auth/login.php"),
+    ("dashboard", "GET", "/dashboard.php"),
+    ("editor", "GET", "/editor.php"),
+]
+JOURNEY_USERS = 10
+JOURNEY_SESSIONS = 3
+JOURNEY_RAMP_UP = 10.0
+JOURNEY_THINK_TIME = 1.0
+
+# Deployed assets are hashed against this directory; the validators of assets
+# that matched are kept so later runs can ask for a 304 instead of the body
+ASSET_STATE_FILE = ".validate-cache/assets.json"
+HASH_CHUNK_SIZE = 65536
+
+# Fingerprinted assets never change under their name, so anything shorter
+# than a year of caching is a server misconfiguration
+CACHE_MIN_MAX_AGE = 365 * 24 * 3600
+
+# The crawl starts from the known pages and follows same-host links this many
+# hops, discovering at most CRAWL_BUDGET URLs (pages and assets together)
+CRAWL_DEPTH = 3
+CRAWL_BUDGET = 200
+CRAWL_CHUNK_SIZE = 16384
+PAGE_EXTENSIONS = {"", ".php", ".html", ".htm"}
+ASSET_EXTENSIONS = {".css", ".js"}
+
+# Only ask for encodings we can decode to hash the content
+_BROTLI = _brotli()
+ACCEPT_ENCODING = "br, gzip" if _BROTLI else "gzip"
+
+_session = None
+_fetch_pool = None
+_cache = {}
+_cache_lock = threading.Lock()
+_site_map = None
+_site_map_lock = threading.Lock()
+_output = threading.local()
+
+def log(message=""):
+    """Print, or collect into the running check's output when checks run concurrently"""
+    lines = getattr(_output, "lines", None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(message)
+
+def make_session(concurrency=CONCURRENCY):
+    """A keep-alive session whose connection pool fits the concurrency limit"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def configure(concurrency=CONCURRENCY):
+    """Set up the shared session and fetch pool used by every check"""
+    global _session, _fetch_pool, _site_map
+    if _fetch_pool is not None:
+        _fetch_pool.shutdown(wait=False)
+    _session = make_session(concurrency)
+    _fetch_pool = ThreadPoolExecutor(max_workers=concurrency)
+    with _cache_lock:
+        _cache.clear()
+    with _site_map_lock:
+        _site_map = None
+
+def _timed_get(url, timeout, on_chunk=None):
+    start = time.monotonic()
+    if on_chunk is None:
+        response = _session.get(url, timeout=timeout)
+        response.content  # read the body inside the timing
+        return response, time.monotonic() - start
+    
+    # Stream HTML through on_chunk so links are followed while the page loads
+    response = _session.get(url, timeout=timeout, stream=True)
+    html = "html" in response.headers.get("Content-Type", "")
+    chunks = []
+    for chunk in response.iter_content(CRAWL_CHUNK_SIZE):
+        chunks.append(chunk)
+        if html:
+            on_chunk(chunk)
+    response._content = b"".join(chunks)  # what response.content would have read
+    return response, time.monotonic() - start
+
+def fetch_async(path, timeout=10):
+    """Start (or join) the one cached GET of a path; returns a Future of (response, seconds)"""
+    if _session is None:
+        configure()
+    url = urljoin(BASE_URL, path)
+    with _cache_lock:
+        future = _cache.get(url)
+        if future is None:
+            future = _fetch_pool.submit(_timed_get, url, timeout)
+            _cache[url] = future
+    return future
+
+def fetch(path, timeout=10):
+    """GET a path once per validation pass, sharing the response between checks"""
+    return fetch_async(path, timeout).result()[0]
+
+def prefetch(paths):
+    """Put every path in flight at once so later checks read from the cache"""
+    for path in paths:
+        fetch_async(path)
+
+class _LinkParser(HTMLParser):
+    """Reports link, stylesheet and script URLs of an HTML stream as they appear"""
+    
+    def __init__(self, found):
+        super().__init__(convert_charrefs=True)
+        self.found = found
+        self.decode = codecs.getincrementaldecoder("utf-8")(errors="replace").decode
+    
+    def feed_bytes(self, chunk):
+        self.feed(self.decode(chunk))
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ("a", "link") and attrs.get("href"):
+            self.found(attrs["href"])
+        elif tag == "script" and attrs.get("src"):
+            self.found(attrs["src"])
+
+def _link_kind(path):
+    """'page', 'asset' or None (images, downloads, ...) for a URL path"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ASSET_EXTENSIONS:
+        return "asset"
+    if extension in PAGE_EXTENSIONS:
+        return "page"
+    return None
+
+def crawl(seeds=("/",), max_depth=CRAWL_DEPTH, max_urls=CRAWL_BUDGET, timeout=10):
+    """Discover the site's pages and assets by following links from the seeds
+    
+    Pages are fetched through the shared cache, so checks that look at them
+    later reuse the same responses, and each page is parsed as it streams
+    in so its links are requested before it has finished loading. Assets
+    are only recorded; their checks fetch them. Only URLs on BASE_URL's host
+    are followed. Returns (pages, assets) as lists of paths in discovery order.
+    """
+    host = urlparse(BASE_URL).netloc
+    done = threading.Condition()
+    seen = set()
+    pages = []
+    assets = []
+    pending = 0
+    
+    def discover(base, reference, depth):
+        nonlocal pending
+        url = urljoin(base, reference.strip())
+        parts = urlparse(url)
+        if parts.scheme not in ("http", "https") or parts.netloc != host:
+            return
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        kind = _link_kind(parts.path)
+        if kind is None or (kind == "page" and depth > max_depth):
+            return
+        with done:
+            if path in seen or len(seen) >= max_urls:
+                return
+            seen.add(path)
+            if kind == "asset":
+                assets.append(path)
+                return
+            pages.append(path)
+            pending += 1
+        visit(path, urljoin(BASE_URL, path), depth)
+    
+    def visit(path, url, depth):
+        parser = _LinkParser(lambda reference: discover(url, reference, depth + 1))
+        with _cache_lock:
+            future = _cache.get(url)
+            streamed = future is None
+            if streamed:
+                future = _fetch_pool.submit(_timed_get, url, timeout, parser.feed_bytes)
+                _cache[url] = future
+        
+        def finished(future):
+            nonlocal pending
+            try:
+                if not streamed and future.exception() is None:
+                    parser.feed_bytes(future.result()[0].content)
+                parser.close()
+            except Exception:
+                pass  # the checks report pages that can't be fetched or parsed
+            finally:
+                with done:
+                    pending -= 1
+                    done.notify_all()
+        
+        future.add_done_callback(finished)
+    
+    if _session is None:
+        configure()
+    for seed in seeds:
+        discover(BASE_URL, seed, 0)
+    with done:
+        done.wait_for(lambda: pending == 0)
+    return pages, assets
+
+def site_map():
+    """The pages and assets of the site, crawled once per validation pass"""
+    global _site_map
+    with _site_map_lock:
+        if _site_map is None:
+            seeds = ["/"] + [path for path, _ in PERFORMANCE_PAGES]
+            _site_map = crawl(seeds, CRAWL_DEPTH, CRAWL_BUDGET)
+        return _site_map
 
 def test_page(path, expected_status=200, expected_content=None, description=""):
     """Test a single page"""
     try:
-        url = urljoin(BASE_URL, path)
-        response = requests.get(url, timeout=10)
+        response = fetch(path)
         
         status_ok = response.status_code == expected_status
         content_ok = True
@@ -25,21 +274,118 @@ def test_page(path, expected_status=200, expected_content=None, description=""):
             content_ok = expected_content.lower() in response.text.lower()
         
         if status_ok and content_ok:
-            print(f"✅ {description or path}: OK (HTTP {response.status_code})")
+            log(f"✅ {description or path}: OK (HTTP {response.status_code})")
             return True
         else:
-            print(f"❌ {description or path}: Failed (HTTP {response.status_code})")
+            log(f"❌ {description or path}: Failed (HTTP {response.status_code})")
             if expected_content and not content_ok:
-                print(f"   Expected content '{expected_content}' not found")
+                log(f"   Expected content '{expected_content}' not found")
             return False
             
     except Exception as e:
-        print(f"❌ {description or path}: Error - {e}")
+        log(f"❌ {description or path}: Error - {e}")
         return False
 
+def local_sha256(path):
+    """SHA-256 of the package file behind a URL path, or None if it isn't in the package
+
+    Fingerprinted names are mapped back to their source file through the
+    asset manifest of the last build.
+    """
+    relative = path.lstrip("/")
+    if FINGERPRINT_PATTERN.search(relative):
+        originals = {fingerprinted: original for original, fingerprinted in load_asset_manifest().items()}
+        relative = originals.get(relative, relative)
+    local_path = os.path.join(PACKAGE_DIR, relative)
+    if not os.path.isfile(local_path):
+        return None
+    return file_sha256(local_path)
+
+def load_asset_state(path=ASSET_STATE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_asset_state(state, path=ASSET_STATE_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def _decoder(encoding):
+    """Incremental decoder for a Content-Encoding: returns a function bytes -> bytes"""
+    if encoding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+    if encoding == "deflate":
+        return zlib.decompressobj().decompress
+    if encoding == "br" and _BROTLI:
+        return _BROTLI.Decompressor().process
+    if encoding in ("", "identity"):
+        return lambda data: data
+    return None
+
+def check_asset(path, known=None, timeout=10):
+    """Stream an asset, hashing it in chunks, and compare it with the package copy
+
+    The request accepts compressed encodings; the body is decoded as it
+    streams, so both the bytes on the wire and the decoded size are known.
+    `known` is what the last matching run stored for the URL; while the local
+    file still has that hash the request is conditional and a 304 counts as a
+    match. Returns (ok, message, validators to store or None, sizes) where
+    sizes is {"encoding", "wire", "decoded"}, or None without a body.
+    """
+    if _session is None:
+        configure()
+    url = urljoin(BASE_URL, path)
+    expected = local_sha256(path)
+    headers = {"Accept-Encoding": ACCEPT_ENCODING}
+    if known and expected and known.get("sha256") == expected:
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+    
+    with _session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304 and len(headers) > 1:
+            return True, "unchanged (HTTP 304)", known, None
+        if response.status_code != 200:
+            return False, f"Failed (HTTP {response.status_code})", None, None
+        
+        encoding = response.headers.get("Content-Encoding", "identity").strip().lower()
+        decode = _decoder(encoding)
+        if decode is None:
+            return False, f"Unsupported Content-Encoding '{encoding}'", None, None
+        digest = hashlib.sha256()
+        wire = 0
+        decoded = 0
+        for chunk in response.raw.stream(HASH_CHUNK_SIZE, decode_content=False):
+            wire += len(chunk)
+            data = decode(chunk)
+            digest.update(data)
+            decoded += len(data)
+        actual = digest.hexdigest()
+        sizes = {"encoding": encoding, "wire": wire, "decoded": decoded}
+        length = response.headers.get("Content-Length")
+        if length is not None and int(length) != wire:
+            return False, f"Partial body ({wire} of {length} bytes)", None, sizes
+        transfer = (f"{encoding} {wire / 1024:.1f} KB of {decoded / 1024:.1f} KB"
+                    if encoding != "identity" else f"uncompressed {decoded / 1024:.1f} KB")
+        if expected is None:
+            return True, f"OK (HTTP 200, {transfer}, not in local package)", None, sizes
+        if actual != expected:
+            return False, f"Content differs from {PACKAGE_DIR}{path} (stale or partial upload)", None, sizes
+        validators = {
+            "sha256": actual,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        return True, f"OK (HTTP 200, {transfer}, hash matches)", validators, sizes
+
 def test_assets():
-    """Test CSS and JS assets"""
-    print("\n🎨 Testing Assets...")
+    """Test CSS and JS assets against the local package"""
+    log("\n🎨 Testing Assets...")
     
     assets = [
         ("/css/main.css", "CSS Main Stylesheet"),
@@ -51,18 +397,100 @@ def test_assets():
         ("/js/editor.js", "JavaScript Editor Script"),
         ("/js/auth.js", "JavaScript Auth Script"),
     ]
+    # Fingerprinted copies are covered by the caching check
+    known = {path for path, _ in assets}
+    assets += [(path, f"{path} (crawled)") for path in site_map()[1]
+               if path not in known and not FINGERPRINT_PATTERN.search(path)]
     
+    if _session is None:
+        configure()
+    state = load_asset_state()
+    futures = [(path, description, _fetch_pool.submit(check_asset, path, state.get(urljoin(BASE_URL, path))))
+               for path, description in assets]
     passed = 0
-    for path, description in assets:
-        if test_page(path, 200, None, description):
+    revalidated = 0
+    wire = decoded = compressed = 0
+    for path, description, future in futures:
+        url = urljoin(BASE_URL, path)
+        try:
+            ok, message, validators, sizes = future.result()
+        except Exception as e:
+            ok, message, validators, sizes = False, f"Error - {e}", None, None
+        if sizes:
+            wire += sizes["wire"]
+            decoded += sizes["decoded"]
+            compressed += sizes["encoding"] != "identity"
+        if validators and (validators.get("etag") or validators.get("last_modified")):
+            state[url] = validators
+        else:
+            state.pop(url, None)
+        if message.startswith("unchanged"):
+            revalidated += 1
+        log(f"{'✅' if ok else '❌'} {description}: {message}")
+        if ok:
             passed += 1
     
-    print(f"📊 Assets: {passed}/{len(assets)} passed")
+    try:
+        save_asset_state(state)
+    except OSError as e:
+        log(f"⚠️ Could not save asset validators: {e}")
+    
+    log(f"📊 Assets: {passed}/{len(assets)} passed ({revalidated} revalidated with a 304)")
+    if decoded:
+        fetched = len(assets) - revalidated
+        log(f"📉 Transferred {wire / 1024:.1f} KB for {decoded / 1024:.1f} KB of assets "
+            f"({100 - wire * 100 / decoded:.0f}% saved), {compressed}/{fetched} served compressed")
+        if compressed < fetched:
+            log("   ⚠️ Enable gzip_static (and brotli_static) in nginx to serve the precompressed files")
+    return passed == len(assets)
+
+def max_age(cache_control):
+    """The max-age of a Cache-Control header in seconds, or None"""
+    match = re.search(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", cache_control or "", re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+def test_cache_headers():
+    """Test that pages link fingerprinted assets and those are cached far into the future"""
+    log("\n🔖 Testing Fingerprinted Asset Caching...")
+    
+    assets = [path for path in site_map()[1] if FINGERPRINT_PATTERN.search(path)]
+    if not assets:
+        log("❌ No page links a fingerprinted asset (deploy a build from package_builder.py)")
+        return False
+    
+    prefetch(assets)
+    passed = 0
+    for path in assets:
+        try:
+            response = fetch(path)
+        except Exception as e:
+            log(f"❌ {path}: Error - {e}")
+            continue
+        if response.status_code != 200:
+            log(f"❌ {path}: Failed (HTTP {response.status_code})")
+            continue
+        # The name carries the content hash, so the body can be checked against it
+        name_hash = path.rsplit(".", 2)[1]
+        if hashlib.sha256(response.content).hexdigest()[:FINGERPRINT_LENGTH] != name_hash:
+            log(f"❌ {path}: Content doesn't match its fingerprint")
+            continue
+        cache_control = response.headers.get("Cache-Control", "")
+        age = max_age(cache_control)
+        if age is None or age < CACHE_MIN_MAX_AGE or "no-cache" in cache_control or "no-store" in cache_control:
+            log(f"❌ {path}: Cache-Control '{cache_control or 'missing'}' (want max-age >= {CACHE_MIN_MAX_AGE})")
+            continue
+        note = "" if "immutable" in cache_control else " (add 'immutable' to skip reload revalidation)"
+        log(f"✅ {path}: max-age {age // 86400} days{note}")
+        passed += 1
+    
+    log(f"📊 Fingerprinted Assets: {passed}/{len(assets)} cached long-term")
+    if passed < len(assets):
+        log("   ⚠️ Add a far-future Cache-Control for name.<hash>.css/js to the nginx config")
     return passed == len(assets)
 
 def test_php_pages():
     """Test PHP pages"""
-    print("\n📄 Testing PHP Pages...")
+    log("\n📄 Testing PHP Pages...")
     
     pages = [
         ("/", "EzEdit.co", "Homepage"),
@@ -70,60 +498,58 @@ def test_php_pages():
         ("/dashboard.php", "Dashboard", "Dashboard Page"),
         ("/editor.php", "Monaco Editor", "Editor Interface"),
     ]
+    known = {path for path, _, _ in pages}
+    pages += [(path, None, f"{path} (crawled)") for path in site_map()[0] if path not in known]
     
+    prefetch(path for path, _, _ in pages)
     passed = 0
     for path, expected_content, description in pages:
         if test_page(path, 200, expected_content, description):
             passed += 1
     
-    print(f"📊 PHP Pages: {passed}/{len(pages)} passed")
+    log(f"📊 PHP Pages: {passed}/{len(pages)} passed")
     return passed == len(pages)
 
 def test_login_functionality():
     """Test login functionality"""
-    print("\n🔐 Testing Login Functionality...")
+    log("\n🔐 Testing Login Functionality...")
     
-    session = requests.Session()
+    # Own cookie jar, so it cannot share the cached anonymous fetches
+    session = make_session(1)
     
     try:
         # Get login page
         login_url = urljoin(BASE_URL, "/auth/login.php")
-        response = session.get(login_url)
+        response = session.get(login_url, timeout=10)
         
         if response.status_code != 200:
-            print("❌ Login page not accessible")
+            log("❌ Login page not accessible")
             return False
         
         # Attempt login with mock credentials
-        login_data = {
-            'email': 'test@example.com',
-            'password': 'password123'
-        }
-        
-        response = session.post(login_url, data=login_data)
+        response = session.post(login_url, data=LOGIN_DATA, timeout=10)
         
         # Check if redirected to dashboard (or if login was successful)
         if response.status_code == 200 or 'dashboard' in response.url.lower():
-            print("✅ Login functionality: OK")
+            log("✅ Login functionality: OK")
             return True
         else:
-            print(f"❌ Login functionality: Failed (HTTP {response.status_code})")
+            log(f"❌ Login functionality: Failed (HTTP {response.status_code})")
             return False
             
     except Exception as e:
-        print(f"❌ Login functionality: Error - {e}")
+        log(f"❌ Login functionality: Error - {e}")
         return False
 
 def test_editor_components():
     """Test editor page components"""
-    print("\n⚙️ Testing Editor Components...")
+    log("\n⚙️ Testing Editor Components...")
     
     try:
-        editor_url = urljoin(BASE_URL, "/editor.php")
-        response = requests.get(editor_url, timeout=15)
+        response = fetch("/editor.php", timeout=15)
         
         if response.status_code != 200:
-            print("❌ Editor page not accessible")
+            log("❌ Editor page not accessible")
             return False
         
         content = response.text.lower()
@@ -139,99 +565,374 @@ def test_editor_components():
         passed = 0
         for name, keyword in components:
             if keyword in content:
-                print(f"✅ {name}: Found")
+                log(f"✅ {name}: Found")
                 passed += 1
             else:
-                print(f"❌ {name}: Not found")
+                log(f"❌ {name}: Not found")
         
-        print(f"📊 Editor Components: {passed}/{len(components)} found")
+        log(f"📊 Editor Components: {passed}/{len(components)} found")
         return passed >= len(components) * 0.8  # Allow 80% pass rate
         
     except Exception as e:
-        print(f"❌ Editor components: Error - {e}")
+        log(f"❌ Editor components: Error - {e}")
         return False
 
 def test_navigation():
     """Test navigation between pages"""
-    print("\n🧭 Testing Navigation...")
-    
-    session = requests.Session()
+    log("\n🧭 Testing Navigation...")
     
     # Test navigation flow: Home -> Login -> Dashboard -> Editor
+    # (anonymous, so the cached fetches are exactly what a new visitor gets)
     try:
+        prefetch(["/", "/dashboard.php"])
+        
         # Start at homepage
-        response = session.get(BASE_URL)
+        response = fetch("/")
         if response.status_code != 200:
-            print("❌ Homepage not accessible")
+            log("❌ Homepage not accessible")
             return False
         
-        print("✅ Homepage accessible")
+        log("✅ Homepage accessible")
         
         # Check if login link exists
         if '/auth/login.php' in response.text:
-            print("✅ Login link found on homepage")
+            log("✅ Login link found on homepage")
         else:
-            print("⚠️ Login link not found on homepage")
+            log("⚠️ Login link not found on homepage")
         
         # Test direct access to dashboard (should work even without login in demo mode)
-        dashboard_response = session.get(urljoin(BASE_URL, "/dashboard.php"))
+        dashboard_response = fetch("/dashboard.php")
         if dashboard_response.status_code == 200:
-            print("✅ Dashboard accessible")
+            log("✅ Dashboard accessible")
         else:
-            print("❌ Dashboard not accessible")
+            log("❌ Dashboard not accessible")
         
         # Check if editor link exists on dashboard
         if 'editor.php' in dashboard_response.text:
-            print("✅ Editor link found on dashboard")
+            log("✅ Editor link found on dashboard")
         else:
-            print("⚠️ Editor link not found on dashboard")
+            log("⚠️ Editor link not found on dashboard")
         
         return True
         
     except Exception as e:
-        print(f"❌ Navigation test: Error - {e}")
+        log(f"❌ Navigation test: Error - {e}")
         return False
 
 def test_performance():
     """Test basic performance metrics"""
-    print("\n⚡ Testing Performance...")
+    log("\n⚡ Testing Performance...")
     
-    pages_to_test = [
-        ("/", "Homepage"),
-        ("/auth/login.php", "Login"),
-        ("/dashboard.php", "Dashboard"),
-        ("/editor.php", "Editor"),
-    ]
+    known = {path for path, _ in PERFORMANCE_PAGES}
+    pages_to_test = PERFORMANCE_PAGES + [(path, path) for path in site_map()[0] if path not in known]
     
     total_time = 0
     passed = 0
     
+    # Timings come from the shared fetches: full body read, monotonic clock
+    prefetch(path for path, _ in pages_to_test)
     for path, name in pages_to_test:
         try:
-            start_time = time.time()
-            response = requests.get(urljoin(BASE_URL, path), timeout=10)
-            end_time = time.time()
-            
-            load_time = end_time - start_time
+            response, load_time = fetch_async(path).result()
             total_time += load_time
             
             if response.status_code == 200:
                 if load_time < 3.0:  # Target: < 3 seconds
-                    print(f"✅ {name}: {load_time:.2f}s")
+                    log(f"✅ {name}: {load_time:.2f}s")
                     passed += 1
                 else:
-                    print(f"⚠️ {name}: {load_time:.2f}s (slow)")
+                    log(f"⚠️ {name}: {load_time:.2f}s (slow)")
             else:
-                print(f"❌ {name}: HTTP {response.status_code}")
+                log(f"❌ {name}: HTTP {response.status_code}")
                 
         except Exception as e:
-            print(f"❌ {name}: Error - {e}")
+            log(f"❌ {name}: Error - {e}")
     
     avg_time = total_time / len(pages_to_test) if pages_to_test else 0
-    print(f"📊 Average load time: {avg_time:.2f}s")
+    log(f"📊 Average load time: {avg_time:.2f}s")
     
     return passed >= len(pages_to_test) * 0.75  # 75% pass rate
 
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def benchmark_endpoint(path, total=BENCH_REQUESTS, concurrency=BENCH_CONCURRENCY, rate=None, timeout=10):
+    """Send `total` GETs to one path and summarise latency, throughput and errors
+    
+    Without `rate` the workers run closed-loop, each sending its next request
+    as soon as the last one finished. With `rate` (requests/second) requests
+    are sent on a fixed schedule instead, and latency is measured from the
+    scheduled send time so a saturated server can't hide its queueing delay.
+    """
+    url = urljoin(BASE_URL, path)
+    session = make_session(concurrency)
+    latencies = []
+    sizes = []
+    statuses = {}
+    errors = 0
+    lock = threading.Lock()
+    started = time.monotonic()
+    
+    def one(index):
+        nonlocal errors
+        scheduled = started + index / rate if rate else None
+        if scheduled is not None:
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        sent = scheduled if scheduled is not None else time.monotonic()
+        try:
+            response = session.get(url, timeout=timeout)
+            body = response.content
+            elapsed = time.monotonic() - sent
+            with lock:
+                latencies.append(elapsed)
+                sizes.append(len(body))
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code >= 400:
+                    errors += 1
+        except Exception:
+            with lock:
+                errors += 1
+                statuses["error"] = statuses.get("error", 0) + 1
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.monotonic() - started
+    session.close()
+    
+    samples = list(latencies)
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": total,
+        "concurrency": concurrency,
+        "target_rate": rate,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "rps": total / wall if wall > 0 else 0.0,
+        "wall_seconds": wall,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1] if latencies else 0.0,
+        "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        "bytes": max(sizes) if sizes else 0,
+        "samples": samples,
+    }
+
+def print_benchmark_table(results):
+    """Print benchmark results as a fixed-width table (latencies in ms)"""
+    header = f"{'Endpoint':<22}{'Reqs':>6}{'Err%':>7}{'RPS':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'Max':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['path']:<22}{r['requests']:>6}{r['error_rate'] * 100:>6.1f}%{r['rps']:>9.1f}"
+              f"{r['p50'] * 1000:>9.1f}{r['p90'] * 1000:>9.1f}{r['p99'] * 1000:>9.1f}{r['max'] * 1000:>9.1f}")
+
+def run_benchmark(paths=None, total=BENCH_REQUESTS, concurrency=BENCH_CONCURRENCY, rate=None, json_path=None):
+    """Benchmark each endpoint in turn and report a table plus JSON"""
+    paths = paths or [path for path, _ in PERFORMANCE_PAGES]
+    mode = f"{rate:g} req/s target" if rate else f"concurrency {concurrency}"
+    print("⚡ EzEdit.co Performance Benchmark")
+    print("=" * 40)
+    print(f"🎯 Testing: {BASE_URL}")
+    print(f"📊 {total} requests per endpoint, {mode}\n")
+    
+    results = []
+    for path in paths:
+        results.append(benchmark_endpoint(path, total, concurrency, rate))
+    
+    print_benchmark_table(results)
+    
+    report = {
+        "base_url": BASE_URL,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if json_path == "-":
+        print(json.dumps(report, indent=2))
+    elif json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 JSON results written to {json_path}")
+    
+    metrics = {}
+    for r in results:
+        metrics[f"latency:{r['path']}"] = r["samples"]
+        metrics[f"error_rate:{r['path']}"] = r["error_rate"]
+        metrics[f"size:{r['path']}"] = r["bytes"]
+    report["metrics"] = metrics
+    
+    return all(r["errors"] == 0 for r in results), report
+
+def run_journeys(users=JOURNEY_USERS, sessions=JOURNEY_SESSIONS, ramp_up=JOURNEY_RAMP_UP,
+                 think_time=JOURNEY_THINK_TIME, timeout=10):
+    """Walk JOURNEY_STEPS as `users` concurrent virtual users, `sessions` times each
+    
+    Every user has its own session, so its own cookie jar and keep-alive
+    connection; cookies are cleared before each journey so every journey logs
+    in afresh. Each request is recorded with the number of users active when
+    it was sent, which shows the concurrency at which a step starts to slow.
+    """
+    samples = []  # (step, seconds, ok, active users)
+    durations = []
+    lock = threading.Lock()
+    active = 0
+    started = time.monotonic()
+    
+    def user(index):
+        nonlocal active
+        delay = started + index * ramp_up / users - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        session = make_session(1)
+        with lock:
+            active += 1
+        try:
+            for _ in range(sessions):
+                session.cookies.clear()
+                journey_started = time.monotonic()
+                completed = True
+                for number, (name, method, path) in enumerate(JOURNEY_STEPS):
+                    if number and think_time:
+                        time.sleep(think_time * random.uniform(0.5, 1.5))
+                    with lock:
+                        concurrent = active
+                    sent = time.monotonic()
+                    try:
+                        response = session.request(method, urljoin(BASE_URL, path), timeout=timeout,
+                                                   data=LOGIN_DATA if method == "POST" else None)
+                        response.content
+                        ok = response.status_code < 400
+                    except Exception:
+                        ok = False
+                    with lock:
+                        samples.append((name, time.monotonic() - sent, ok, concurrent))
+                    if not ok:
+                        completed = False
+                        break
+                if completed:
+                    with lock:
+                        durations.append(time.monotonic() - journey_started)
+        finally:
+            session.close()
+            with lock:
+                active -= 1
+    
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, range(users)))
+    wall = time.monotonic() - started
+    
+    steps = []
+    for name, _, _ in JOURNEY_STEPS:
+        latencies = [seconds for step, seconds, _, _ in samples if step == name]
+        errors = sum(1 for step, _, ok, _ in samples if step == name and not ok)
+        ordered = sorted(latencies)
+        steps.append({
+            "step": name,
+            "requests": len(latencies),
+            "errors": errors,
+            "error_rate": errors / len(latencies) if latencies else 0.0,
+            "p50": percentile(ordered, 50),
+            "p90": percentile(ordered, 90),
+            "p99": percentile(ordered, 99),
+            "max": ordered[-1] if ordered else 0.0,
+            "samples": latencies,
+        })
+    
+    # p90 of each step by the number of users active when it was sent
+    by_users = {}
+    for name, seconds, _, concurrent in samples:
+        by_users.setdefault(concurrent, {}).setdefault(name, []).append(seconds)
+    ordered = sorted(durations)
+    return {
+        "users": users,
+        "sessions_per_user": sessions,
+        "ramp_up": ramp_up,
+        "think_time": think_time,
+        "sessions": users * sessions,
+        "completed": len(durations),
+        "wall_seconds": wall,
+        "sessions_per_minute": len(durations) * 60 / wall if wall > 0 else 0.0,
+        "session_p50": percentile(ordered, 50),
+        "session_p90": percentile(ordered, 90),
+        "steps": steps,
+        "by_users": {str(count): {name: percentile(sorted(values), 90) for name, values in names.items()}
+                     for count, names in sorted(by_users.items())},
+    }
+
+def print_journey_report(result):
+    """Per-step latency table, session throughput and p90 by active users (ms)"""
+    header = f"{'Step':<14}{'Reqs':>6}{'Err%':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'Max':>9}"
+    print(header)
+    print("-" * len(header))
+    for s in result["steps"]:
+        print(f"{s['step']:<14}{s['requests']:>6}{s['error_rate'] * 100:>6.1f}%"
+              f"{s['p50'] * 1000:>9.1f}{s['p90'] * 1000:>9.1f}{s['p99'] * 1000:>9.1f}{s['max'] * 1000:>9.1f}")
+    
+    print(f"\n👥 {result['completed']}/{result['sessions']} journeys completed in {result['wall_seconds']:.1f}s "
+          f"({result['sessions_per_minute']:.1f} sessions/min, "
+          f"journey p50 {result['session_p50']:.2f}s, p90 {result['session_p90']:.2f}s)")
+    
+    names = [name for name, _, _ in JOURNEY_STEPS]
+    print("\n📈 p90 (ms) by users active when the request was sent:")
+    header = f"{'Users':>6}" + "".join(f"{name:>12}" for name in names)
+    print(header)
+    print("-" * len(header))
+    for count, p90s in result["by_users"].items():
+        cells = "".join(f"{p90s[name] * 1000:>12.1f}" if name in p90s else f"{'-':>12}" for name in names)
+        print(f"{count:>6}{cells}")
+
+def run_journey_test(users=JOURNEY_USERS, sessions=JOURNEY_SESSIONS, ramp_up=JOURNEY_RAMP_UP,
+                     think_time=JOURNEY_THINK_TIME, json_path=None):
+    """Run the journey load test and report a table plus JSON"""
+    print("👥 EzEdit.co Journey Load Test")
+    print("=" * 40)
+    print(f"🎯 Testing: {BASE_URL}")
+    print(f"📊 {users} users x {sessions} journeys, ramp-up {ramp_up:g}s, think time {think_time:g}s")
+    print(f"🧭 {' -> '.join(name for name, _, _ in JOURNEY_STEPS)}\n")
+    
+    result = run_journeys(users, sessions, ramp_up, think_time)
+    print_journey_report(result)
+    
+    report = {
+        "base_url": BASE_URL,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "result": result,
+    }
+    if json_path == "-":
+        print(json.dumps(report, indent=2))
+    elif json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 JSON results written to {json_path}")
+    
+    metrics = {}
+    for s in result["steps"]:
+        metrics[f"latency:{s['step']}"] = s["samples"]
+        metrics[f"error_rate:{s['step']}"] = s["error_rate"]
+    report["metrics"] = metrics
+    
+    return result["completed"] == result["sessions"], report
+
+def record_run(tool, metrics, details=None, gate=None):
+    """Save a run to the benchmark history and optionally gate it against a baseline
+    
+    Returns False only when the gate finds a regression.
+    """
+    history = History()
+    run = history.record(tool, metrics, target=BASE_URL, details=details)
+    print(f"\n💾 Recorded run {run['id']}")
+    if not gate:
+        return True
+    return gate_run(history, run, gate)
+
 def generate_report(results):
     """Generate a deployment report"""
     print("\n" + "="*60)
@@ -266,27 +967,130 @@ def generate_report(results):
     print(f"\n🌐 Test URL: {BASE_URL}")
     print("📊 Run this script again after making fixes")
 
-def main():
+TESTS = [
+    ("PHP Pages", test_php_pages),
+    ("Assets (CSS/JS)", test_assets),
+    ("Asset Caching", test_cache_headers),
+    ("Login Functionality", test_login_functionality),
+    ("Editor Components", test_editor_components),
+    ("Navigation Flow", test_navigation),
+    ("Performance", test_performance),
+]
+
+def _run_captured(test):
+    """Run one check, collecting its output so concurrent checks don't interleave"""
+    _output.lines = []
+    try:
+        return test(), _output.lines
+    finally:
+        _output.lines = None
+
+def run_tests(tests=TESTS):
+    """Run every check concurrently and print their output in the usual order"""
+    with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+        futures = [(name, pool.submit(_run_captured, test)) for name, test in tests]
+        results = {}
+        for name, future in futures:
+            passed, lines = future.result()
+            for line in lines:
+                print(line)
+            results[name] = passed
+    return results
+
+def collect_fetch_metrics():
+    """Latency and size of every URL the validation pass fetched"""
+    metrics = {}
+    with _cache_lock:
+        items = list(_cache.items())
+    for url, future in items:
+        if future.done() and future.exception() is None:
+            response, seconds = future.result()
+            path = url[len(BASE_URL):] or "/"
+            metrics[f"latency:{path}"] = [seconds]
+            metrics[f"size:{path}"] = len(response.content)
+    return metrics
+
+def main(concurrency=CONCURRENCY, history=True, gate=None):
     print("🧪 EzEdit.co Deployment Validation")
     print("=" * 40)
     print(f"🎯 Testing: {BASE_URL}")
     print("⏱️ Starting comprehensive tests...\n")
     
+    configure(concurrency)
+    started = time.monotonic()
+    
     # Run all tests
-    results = {
-        "PHP Pages": test_php_pages(),
-        "Assets (CSS/JS)": test_assets(),
-        "Login Functionality": test_login_functionality(),
-        "Editor Components": test_editor_components(),
-        "Navigation Flow": test_navigation(),
-        "Performance": test_performance(),
-    }
+    results = run_tests()
+    
+    elapsed = time.monotonic() - started
+    with _cache_lock:
+        fetched = len(_cache)
+    pages, assets = site_map()
+    print(f"\n🕸️ Crawled {len(pages)} pages and {len(assets)} assets (depth {CRAWL_DEPTH}, budget {CRAWL_BUDGET})")
+    print(f"⏱️ Checks finished in {elapsed:.2f}s ({fetched} unique URLs, concurrency {concurrency})")
     
     # Generate report
     generate_report(results)
     
-    return all(results.values())
+    gate_ok = True
+    if history:
+        gate_ok = record_run("validate", collect_fetch_metrics(), details={"checks": results}, gate=gate)
+    
+    return all(results.values()) and gate_ok
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Validate an EzEdit.co deployment")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"maximum number of requests in flight at once "
+                             f"(default {CONCURRENCY}, or {BENCH_CONCURRENCY} per endpoint with --benchmark)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="load-test the performance pages instead of validating")
+    parser.add_argument("--requests", type=int, default=BENCH_REQUESTS,
+                        help="with --benchmark, requests per endpoint")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="with --benchmark, send at this many requests/second per endpoint")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="with --benchmark, endpoint to test (repeatable)")
+    parser.add_argument("--json", dest="json_path",
+                        help="with --benchmark or --journey, write JSON results to this file ('-' for stdout)")
+    parser.add_argument("--no-history", action="store_true",
+                        help="don't record this run in the benchmark history")
+    parser.add_argument("--gate", nargs="?", const="previous", default=None, metavar="BASELINE",
+                        help="fail if this run regresses against a baseline run/tag (default: previous)")
+    parser.add_argument("--crawl-depth", type=int, default=CRAWL_DEPTH,
+                        help="link hops followed from the known pages (0: check only those)")
+    parser.add_argument("--crawl-budget", type=int, default=CRAWL_BUDGET,
+                        help="most URLs the crawl may discover")
+    parser.add_argument("--journey", action="store_true",
+                        help="load-test the login -> dashboard -> editor journey with concurrent virtual users")
+    parser.add_argument("--users", type=int, default=JOURNEY_USERS,
+                        help="with --journey, concurrent virtual users")
+    parser.add_argument("--sessions", type=int, default=JOURNEY_SESSIONS,
+                        help="with --journey, journeys each user walks")
+    parser.add_argument("--ramp-up", type=float, default=JOURNEY_RAMP_UP,
+                        help="with --journey, seconds over which the users start")
+    parser.add_argument("--think-time", type=float, default=JOURNEY_THINK_TIME,
+                        help="with --journey, mean seconds a user pauses between steps")
+    args = parser.parse_args()
+    CRAWL_DEPTH = max(0, args.crawl_depth)
+    CRAWL_BUDGET = max(1, args.crawl_budget)
+    
+    if args.journey:
+        success, report = run_journey_test(max(1, args.users), max(1, args.sessions), max(0.0, args.ramp_up),
+                                           max(0.0, args.think_time), args.json_path)
+        if not args.no_history:
+            details = {"users": args.users, "sessions": args.sessions, "ramp_up": args.ramp_up,
+                       "think_time": args.think_time,
+                       "sessions_per_minute": report["result"]["sessions_per_minute"]}
+            success = record_run("journey", report["metrics"], details, args.gate) and success
+    elif args.benchmark:
+        success, report = run_benchmark(args.paths, max(1, args.requests),
+                                        max(1, args.concurrency or BENCH_CONCURRENCY),
+                                        args.rate, args.json_path)
+        if not args.no_history:
+            details = {"requests": args.requests, "rate": args.rate,
+                       "concurrency": args.concurrency or BENCH_CONCURRENCY}
+            success = record_run("benchmark", report["metrics"], details, args.gate) and success
+    else:
+        success = main(max(1, args.concurrency or CONCURRENCY), not args.no_history, args.gate)
     exit(0 if success else 1)
\ No newline at end of file